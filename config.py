@@ -18,22 +18,46 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 # Input files
 INPUT_CSV_ORIGINAL = 'combined_institutions.csv'
 COOKIES_FILE = 'cookies.json'
+# Chrome profile that keeps the LinkedIn login between runs (cookies.json only bootstraps it)
+LINKEDIN_PROFILE_DIR = '.cache/linkedin_profile'
 
 # Output/processed files
 OUTPUT_CSV_LINKEDIN = 'institutions_linkedin.csv'
 FAISS_INDEX_PATH = "vectorstorage/linkedin_data.index"
 METADATA_PATH = "vectorstorage/linkedin_metadata.json"
 ANALYSIS_OUTPUT_DIR = "analysisJsons" # New directory for JSON outputs
+# Registry of (company, article URL) pairs already ingested, kept next to the index
+SEEN_URLS_PATH = "vectorstorage/seen_urls.json"
+# On-disk cache of scraped responses shared by all scrapers
+CACHE_DB_PATH = ".cache/scrape_cache.db"
+# Seconds to reuse cached article and job page text
+PAGE_CACHE_TTL = 24 * 60 * 60
+# Seconds to reuse cached Brave search results (kept short so news stays fresh)
+SEARCH_CACHE_TTL = 6 * 60 * 60
+# Seconds to reuse cached LLM answers for identical URL-identification prompts
+LLM_CACHE_TTL = 30 * 24 * 60 * 60
 
 # --- Scraping Parameters ---
 # Number of LinkedIn posts to scrape per company
 NO_OF_POSTS_TO_SCRAPE = 10
 # Number of news articles to scrape per company
 NO_OF_NEWS_ARTICLES_TO_SCRAPE = 2
+# Maximum simultaneous HTTP connections when fetching news articles
+NEWS_HTTP_MAX_CONNECTIONS = 16
+# Maximum simultaneous requests to any single news site
+NEWS_HTTP_MAX_PER_HOST = 2
 # Number of website pages to scrape per company
 NO_OF_WEBSITE_PAGES_TO_SCRAPE = 5
+# Number of company websites crawled at the same time
+WEBSITE_CONCURRENT_COMPANIES = 4
+# Number of pages of one website fetched at the same time
+WEBSITE_PAGES_PER_BATCH = 4
+# Bytes of a web page read before the rest is ignored (page text is near the top)
+WEBSITE_MAX_PAGE_BYTES = 512 * 1024
 # Number of apps to check per store for each company
 NO_OF_APPS_TO_SCRAPE = 1 # Set to 1 to focus on the most relevant result
+# Seconds to reuse cached app store lookups (app metadata changes daily at most)
+APP_STORE_CACHE_TTL = 24 * 60 * 60
 # Number of companies to sample for processing in each run
 # Set to None to process all companies
 SAMPLE_SIZE = 5
@@ -43,15 +67,52 @@ RANDOM_STATE = 99
 # --- NEW: Job Board Scraping ---
 # Number of job postings to scrape per board for each company
 NO_OF_JOBS_TO_SCRAPE = 5
+# Jaccard similarity above which job postings and news articles count as duplicates
+DEDUP_JACCARD_THRESHOLD = 0.85
+
+# --- Browser ---
+# Run Chrome without a window (uses the modern "--headless=new" mode)
+BROWSER_HEADLESS = False
+# Resource URL patterns blocked in every Selenium driver. Only page text is used,
+# so images, fonts, media, stylesheets and trackers are never worth downloading.
+BLOCKED_RESOURCE_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg",
+    "*.woff*", "*.ttf", "*.mp4", "*.mp3", "*.css",
+    "*google-analytics*", "*doubleclick*", "*facebook.net*"
+]
+
+# Number of worker threads used to scrape pages concurrently within a step
+PARALLEL_WORKERS = 3
+# Number of warm browsers shared by the news, job board and URL verification steps
+DRIVER_POOL_SIZE = PARALLEL_WORKERS
+# Number of companies whose URLs are searched for at the same time (LLM calls overlap)
+URL_FINDER_CONCURRENCY = 8
+# Number of companies whose search results are sent to the LLM in a single call
+LLM_URL_BATCH_SIZE = 8
+# Top-level domains tried when guessing a company's website from its name before searching
+WEBSITE_GUESS_TLDS = ("com", "ae", "sa")
 
 # --- Vectorization ---
 # Updated to use FinBERT for more accurate financial text embeddings
 EMBEDDING_MODEL = 'ProsusAI/finbert'
+# Texts embedded per forward pass (GPUs saturate at larger batches than CPUs)
+EMBEDDING_BATCH_SIZE_GPU = 128
+EMBEDDING_BATCH_SIZE_CPU = 32
+# OpenMP threads FAISS may use for searches, capped so it doesn't oversubscribe cores torch is using
+FAISS_NUM_THREADS = min(8, os.cpu_count() or 1)
+# FAISS index_factory string for newly created knowledge bases. "Flat" is exact search;
+# "HNSW32" gives sub-linear search for large stores. Types that need training first
+# (IVF, PQ) can't grow one step at a time and fall back to "Flat".
+FAISS_INDEX_FACTORY = "Flat"
 
 # --- LLM Models ---
 # Model for URL finding and analysis
 LLM_MODEL = "gpt-4o-mini"
 
+# --- Brave Search ---
+# Minimum seconds between Brave API calls (the free plan allows 1 request per second)
+BRAVE_API_RATE_LIMIT = 1.0
+
 # --- News Scraping ---
 # List of credible news sources for the Brave Search API query
 CREDIBLE_NEWS_SITES = [
@@ -12,60 +12,64 @@ import os
 import config
 import utils
 from modules.url_finder import URLFinder
-from modules.linkedin_scraper import LinkedInScraper
+from modules.linkedin_scraper import LinkedInScraper, close_linkedin_session
 from modules.website_scraper import WebsiteScraper
 from modules.news_scraper import NewsScraper
 from modules.app_scraper import AppScraper
 from modules.job_scraper import JobBoardScraper
 from modules.analysis_engine import AnalysisEngine
+from modules.scrape_cache import ScrapeCache
+from modules.driver_factory import close_pool
+from modules.brave_search import close as close_brave_client
 
-def step_1_find_urls(df, client):
+def step_1_find_urls(df, client, js_verify=False):
     """Finds and verifies LinkedIn and website URLs for companies."""
     print("\n--- Step 1: Finding LinkedIn & Website URLs ---")
-    finder = URLFinder(openai_client=client)
+    finder = URLFinder(openai_client=client, js_verify=js_verify)
     enriched_df = finder.process_companies(df)
     enriched_df.to_csv(config.OUTPUT_CSV_LINKEDIN, index=False)
     print(f"\n✅ Step 1 Complete. Enriched data saved to '{config.OUTPUT_CSV_LINKEDIN}'")
 
 def step_2_scrape_linkedin(df, vector_store):
-    """Scrapes LinkedIn data and adds it to the vector store."""
+    """
+    Scrapes LinkedIn data and adds it to the vector store.
+    Returns the number of LinkedIn job postings found per company.
+    """
     print("\n--- Step 2: Scraping LinkedIn Profiles ---")
     scraper = LinkedInScraper()
     if not scraper.driver:
-        return
+        return {}
     
     all_documents = []
+    linkedin_job_counts = {}
     for _, row in df.iterrows():
         company_name = row['Cleaned Name']
         linkedin_url = row['linkedin_url']
         print(f"\nProcessing LinkedIn for: {company_name}")
         documents = scraper.scrape_page(company_name, linkedin_url)
         all_documents.extend(documents)
-    scraper.close()
+        linkedin_job_counts[company_name] = sum(1 for doc in documents if doc.metadata.get("type") == "job")
 
     if all_documents:
         valid_documents = [doc for doc in all_documents if doc.page_content and doc.page_content.strip()]
         
         if valid_documents:
             print(f"  -> Found {len(valid_documents)} valid documents to add to the knowledge base.")
-            vector_store.add_documents(valid_documents)
-            vector_store.save_local(config.FAISS_INDEX_PATH)
-            print("\n✅ Step 2 Complete. LinkedIn data vectorized and saved.")
+            utils.add_documents_batched(vector_store, valid_documents)
+            print("\n✅ Step 2 Complete. LinkedIn data vectorized.")
         else:
             print("\n- No valid documents with content found from LinkedIn to add to the knowledge base.")
 
+    return linkedin_job_counts
+
 def step_3_scrape_websites(df, vector_store):
     """Scrapes company websites and adds them to the vector store."""
     print("\n--- Step 3: Scraping Company Websites ---")
     scraper = WebsiteScraper()
     
-    all_documents = []
-    for _, row in df.iterrows():
-        company_name = row['Cleaned Name']
-        website_url = row.get('website_url') 
-        print(f"\nProcessing Website for: {company_name}")
-        documents = scraper.scrape_website(company_name, website_url)
-        all_documents.extend(documents)
+    companies = list(zip(df['Cleaned Name'], df['website_url']))
+    print(f"\nProcessing Websites for: {', '.join(company_name for company_name, _ in companies)}")
+    all_documents = scraper.scrape_websites(companies)
     scraper.close()
 
     if all_documents:
@@ -73,14 +77,16 @@ def step_3_scrape_websites(df, vector_store):
         
         if valid_documents:
             print(f"  -> Found {len(valid_documents)} valid website pages to add to the knowledge base.")
-            vector_store.add_documents(valid_documents)
-            vector_store.save_local(config.FAISS_INDEX_PATH)
-            print("\n✅ Step 3 Complete. Website data vectorized and saved.")
+            utils.add_documents_batched(vector_store, valid_documents)
+            print("\n✅ Step 3 Complete. Website data vectorized.")
         else:
             print("\n- No valid content found from websites to add to the knowledge base.")
 
 def step_4_scrape_news(df, vector_store):
-    """Scrapes news articles and adds them to the vector store."""
+    """
+    Scrapes news articles and adds them to the vector store. Returns the scraper, whose
+    seen-URL registry must be persisted once the vector store has been saved.
+    """
     print("\n--- Step 4: Scraping News Articles ---")
     scraper = NewsScraper()
     
@@ -97,11 +103,11 @@ def step_4_scrape_news(df, vector_store):
         
         if valid_documents:
             print(f"  -> Found {len(valid_documents)} valid news articles to add to the knowledge base.")
-            vector_store.add_documents(valid_documents)
-            vector_store.save_local(config.FAISS_INDEX_PATH)
-            print("\n✅ Step 4 Complete. News data vectorized and saved.")
+            utils.add_documents_batched(vector_store, valid_documents)
+            print("\n✅ Step 4 Complete. News data vectorized.")
         else:
             print("\n- No valid news articles with content found to add to the knowledge base.")
+    return scraper
 
 def step_5_scrape_apps(df, vector_store):
     """Scrapes app stores and adds findings to the vector store."""
@@ -118,22 +124,25 @@ def step_5_scrape_apps(df, vector_store):
 
     if all_documents:
         print(f"  -> Found {len(all_documents)} valid app records to add to the knowledge base.")
-        vector_store.add_documents(all_documents)
-        vector_store.save_local(config.FAISS_INDEX_PATH)
-        print("\n✅ Step 5 Complete. App store data vectorized and saved.")
+        utils.add_documents_batched(vector_store, all_documents)
+        print("\n✅ Step 5 Complete. App store data vectorized.")
     else:
         print("\n- No app store data found to add to the knowledge base.")
 
-def step_6_scrape_jobs(df, vector_store):
-    """Scrapes job boards and adds them to the vector store."""
+def step_6_scrape_jobs(df, vector_store, linkedin_job_counts=None):
+    """
+    Scrapes job boards and adds them to the vector store. Companies whose LinkedIn jobs
+    tab (from Step 2 in the same run) already met the target skip the boards.
+    """
     print("\n--- Step 6: Scraping Job Boards ---")
     scraper = JobBoardScraper()
+    linkedin_job_counts = linkedin_job_counts or {}
     
     all_documents = []
     for _, row in df.iterrows():
         company_name = row['Cleaned Name']
         print(f"\nProcessing Job Boards for: {company_name}")
-        documents = scraper.scrape_jobs(company_name)
+        documents = scraper.scrape_jobs(company_name, linkedin_job_counts.get(company_name, 0))
         all_documents.extend(documents)
     scraper.close()
 
@@ -141,9 +150,8 @@ def step_6_scrape_jobs(df, vector_store):
         valid_documents = [doc for doc in all_documents if doc.page_content and doc.page_content.strip()]
         if valid_documents:
             print(f"  -> Found {len(valid_documents)} valid job postings to add to the knowledge base.")
-            vector_store.add_documents(valid_documents)
-            vector_store.save_local(config.FAISS_INDEX_PATH)
-            print("\n✅ Step 6 Complete. Job posting data vectorized and saved.")
+            utils.add_documents_batched(vector_store, valid_documents)
+            print("\n✅ Step 6 Complete. Job posting data vectorized.")
         else:
             print("\n- No valid content found from job postings to add to the knowledge base.")
 
@@ -175,7 +183,9 @@ def main():
     parser.add_argument('--scrape-news', action='store_true', help="Run Step 4: Scrape news articles and vectorize.")
     parser.add_argument('--scrape-apps', action='store_true', help="Run Step 5: Scrape App Stores and vectorize.")
     parser.add_argument('--scrape-jobs', action='store_true', help="Run Step 6: Scrape job boards and vectorize.")
+    parser.add_argument('--js-verify', action='store_true', help="With --find-urls, re-check pages that block plain HTTP requests in a browser.")
     parser.add_argument('--analyze', type=str, metavar='COMPANY_NAME', help="Run Step 7: Analyze a specific company.")
+    parser.add_argument('--refresh-cache', action='store_true', help="Ignore cached pages and search results, re-fetching and re-caching them.")
     
     args = parser.parse_args()
 
@@ -183,12 +193,14 @@ def main():
         parser.print_help()
         return
 
+    ScrapeCache.refresh = args.refresh_cache
+
     if args.find_urls:
         openai_client = utils.get_openai_client()
         if not openai_client: return
         initial_df = utils.load_and_clean_companies(config.INPUT_CSV_ORIGINAL)
         if initial_df is not None:
-            step_1_find_urls(initial_df, openai_client)
+            step_1_find_urls(initial_df, openai_client, js_verify=args.js_verify)
 
     if args.scrape_linkedin or args.scrape_websites or args.scrape_news or args.scrape_apps or args.scrape_jobs:
         enriched_df = utils.load_enriched_data(config.OUTPUT_CSV_LINKEDIN)
@@ -205,31 +217,47 @@ def main():
         for name in sample_df['Cleaned Name']: print(f"  - {name}")
 
         vector_store = utils.get_vector_store()
+        linkedin_job_counts = {}
         
-        if args.scrape_linkedin:
-            linkedin_df = sample_df.dropna(subset=['linkedin_url'])
-            linkedin_df = linkedin_df[linkedin_df['linkedin_url'].str.contains('linkedin.com', na=False)]
-            if not linkedin_df.empty:
-                step_2_scrape_linkedin(linkedin_df, vector_store)
-            else:
-                print("\n- No valid LinkedIn URLs found in the sample to scrape.")
-
-        if args.scrape_websites:
-            website_df = sample_df.dropna(subset=['website_url'])
-            website_df = website_df[website_df['website_url'].str.startswith('http', na=False)]
-            if not website_df.empty:
-                step_3_scrape_websites(website_df, vector_store)
-            else:
-                print("\n- No valid website URLs found in the sample to scrape.")
+        # Steps only add to the in-memory index; it is written to disk once for the whole run,
+        # even if a later step fails, so data from the steps that finished is kept.
+        news_scraper = None
+        try:
+            if args.scrape_linkedin:
+                # One boolean mask (missing URLs count as no match) instead of dropna plus a filter
+                linkedin_df = sample_df[sample_df['linkedin_url'].str.contains('linkedin.com', na=False, regex=False)]
+                if not linkedin_df.empty:
+                    linkedin_job_counts = step_2_scrape_linkedin(linkedin_df, vector_store)
+                else:
+                    print("\n- No valid LinkedIn URLs found in the sample to scrape.")
+
+            if args.scrape_websites:
+                website_df = sample_df[sample_df['website_url'].str.startswith('http', na=False)]
+                if not website_df.empty:
+                    step_3_scrape_websites(website_df, vector_store)
+                else:
+                    print("\n- No valid website URLs found in the sample to scrape.")
         
-        if args.scrape_news:
-            step_4_scrape_news(sample_df, vector_store)
+            if args.scrape_news:
+                news_scraper = step_4_scrape_news(sample_df, vector_store)
         
-        if args.scrape_apps:
-            step_5_scrape_apps(sample_df, vector_store)
+            if args.scrape_apps:
+                step_5_scrape_apps(sample_df, vector_store)
         
-        if args.scrape_jobs:
-            step_6_scrape_jobs(sample_df, vector_store)
+            if args.scrape_jobs:
+                step_6_scrape_jobs(sample_df, vector_store, linkedin_job_counts)
+        finally:
+            utils.save_vector_store(vector_store)
+            print(f"\n💾 Knowledge base saved. Contains {vector_store.index.ntotal} vectors.")
+            # Only now are the news articles really ingested; marking them seen any earlier
+            # would make later runs skip articles a failed or killed run never saved.
+            if news_scraper is not None:
+                news_scraper.persist_seen()
+
+    # Browsers and the search API are only needed for finding URLs and scraping; free them before analysis
+    close_pool()
+    close_linkedin_session()
+    close_brave_client()
 
     if args.analyze:
         if not os.path.exists(config.FAISS_INDEX_PATH):
@@ -239,7 +267,7 @@ def main():
         llm = utils.get_llm()
         if not llm: return
         
-        vector_store = utils.get_vector_store()
+        vector_store = utils.get_vector_store(mmap=True)
         
         # --- FIX: Clean the input company name to match the metadata format ---
         cleaned_company_name = utils.clean_company_name(args.analyze)
@@ -1,6 +1,6 @@
 # modules/analysis_engine.py
 
-import json
+import orjson
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.runnables import RunnablePassthrough
@@ -14,6 +14,15 @@ class AnalysisEngine:
     batch of documents and then filtering them to build a rich, targeted context.
     """
 
+    # (signal, query template) pairs, formatted with the company name on each analysis.
+    _QUERY_TEMPLATES = (
+        ("strategy_and_vision", "CEO or executive statements about {c}'s strategy, vision, and future plans."),
+        ("technology_and_ai", "Information on {c}'s technology stack, cloud infrastructure (AWS, Azure), AI, machine learning, or digitization efforts."),
+        ("products_and_services", "Details about {c}'s products like BNPL, digital wallets, remittance services, or loans."),
+        ("financial_inclusion", "Statements or programs by {c} related to serving the unbanked, underbanked, SMEs, or specific community groups."),
+        ("hiring_and_growth", "Job postings, hiring signals, or mentions of team expansion at {c}.")
+    )
+
     def __init__(self, llm, vector_store):
         self.llm = llm
         self.vector_store = vector_store
@@ -26,17 +35,11 @@ class AnalysisEngine:
         """
         print(f"  -> Performing advanced multi-query retrieval for '{company_name}'...")
         
-        targeted_queries = {
-            "strategy_and_vision": f"CEO or executive statements about {company_name}'s strategy, vision, and future plans.",
-            "technology_and_ai": f"Information on {company_name}'s technology stack, cloud infrastructure (AWS, Azure), AI, machine learning, or digitization efforts.",
-            "products_and_services": f"Details about {company_name}'s products like BNPL, digital wallets, remittance services, or loans.",
-            "financial_inclusion": f"Statements or programs by {company_name} related to serving the unbanked, underbanked, SMEs, or specific community groups.",
-            "hiring_and_growth": f"Job postings, hiring signals, or mentions of team expansion at {company_name}."
-        }
+        targeted_queries = [(key, template.format(c=company_name)) for key, template in self._QUERY_TEMPLATES]
 
         all_retrieved_docs = []
         # --- FIX: Revert to manual search-then-filter, but with a much larger 'k' value ---
-        for key, query in targeted_queries.items():
+        for key, query in targeted_queries:
             print(f"    -> Searching for signal: '{key}'")
             # Fetch a large number of documents to increase the chance of finding relevant ones
             retrieved_docs = self.vector_store.similarity_search(query, k=150) # Increased k significantly
@@ -95,7 +98,7 @@ class AnalysisEngine:
                     json_end = text.rfind('}') + 1
                     if json_start != -1 and json_end != -1:
                         text = text[json_start:json_end]
-                    return json.loads(text)
+                    return orjson.loads(text)
                 except Exception as e:
                     print(f"Error decoding JSON from LLM output: {e}")
                     return {"error": "Failed to parse LLM JSON output", "raw_output": text}
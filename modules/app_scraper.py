@@ -1,9 +1,12 @@
 # modules/app_scraper.py
 
+import asyncio
 import requests
+import orjson
 from google_play_scraper import search as search_play_store, app as app_play_store
 from langchain.docstore.document import Document
 import config
+from modules.scrape_cache import ScrapeCache
 
 class AppScraper:
     """
@@ -11,34 +14,38 @@ class AppScraper:
     for a given company, returning LangChain Documents.
     """
 
+    # (label, Google Play key, Apple App Store key, is_date) for each detail shown to the LLM.
+    _FIELDS = (
+        ("App Name", "title", "trackName", False),
+        ("Developer", "developer", "artistName", False),
+        ("Description", "description", "description", False),
+        ("Genre", "primaryGenreName", "genre", False),
+        ("Rating", "score", "averageUserRating", False),
+        ("Reviews", "reviews", "userRatingCount", False),
+        ("Last Updated", "updated", "currentVersionReleaseDate", False),
+        ("Release Date", "released", "releaseDate", True),
+        ("Content Rating", "contentRating", "trackContentRating", False),
+    )
+
     def __init__(self):
-        """Initializes the scraper."""
-        pass
+        """Initializes the scraper and its on-disk lookup cache."""
+        self.cache = ScrapeCache("app_store", config.APP_STORE_CACHE_TTL)
 
     def _format_app_details(self, store_name, details):
         """Formats scraped app details into a clean string for the LLM."""
-        key_details = {
-            "App Name": details.get('title') or details.get('trackName'),
-            "Developer": details.get('developer') or details.get('artistName'),
-            "Description": details.get('description'),
-            "Genre": details.get('primaryGenreName') or details.get('genre'),
-            "Rating": details.get('score') or details.get('averageUserRating'),
-            "Reviews": details.get('reviews') or details.get('userRatingCount'),
-            "Last Updated": details.get('updated') or details.get('currentVersionReleaseDate'),
-            "Release Date": details.get('released') or details.get('releaseDate'),
-            "Content Rating": details.get('contentRating') or details.get('trackContentRating'),
-        }
-        
-        text_content = f"--- {store_name} App Information ---\n"
-        for key, value in key_details.items():
-            if value:
-                if isinstance(value, (int, float)):
-                    value = f"{value:,}"
-                if 'Date' in key and isinstance(value, str):
-                    value = value.split('T')[0]
-                text_content += f"{key}: {value}\n"
+        parts = [f"--- {store_name} App Information ---"]
+        append = parts.append
+        for label, primary_key, secondary_key, is_date in self._FIELDS:
+            value = details.get(primary_key) or details.get(secondary_key)
+            if not value:
+                continue
+            if isinstance(value, (int, float)):
+                value = f"{value:,}"
+            if is_date and isinstance(value, str):
+                value = value.split('T', 1)[0]
+            append(f"{label}: {value}")
         
-        return text_content.strip()
+        return "\n".join(parts)
 
     def _search_apple_app_store(self, term, country, limit):
         """Searches the Apple App Store using the official iTunes Search API."""
@@ -54,48 +61,50 @@ class AppScraper:
             print(f"    -> Querying iTunes API for '{term}' in country '{country}'...")
             response = requests.get(url, params=params, timeout=15)
             response.raise_for_status()
-            return response.json().get('results', [])
-        except requests.RequestException as e:
+            return orjson.loads(response.content).get('results', [])
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
             print(f"    ⚠️ An error occurred during Apple App Store API call: {e}")
             return []
 
-    def scrape_apps(self, company_name):
-        """
-        Searches both the Google Play Store and Apple App Store for a company's app,
-        scrapes the top result, and returns LangChain Documents.
-        """
-        print(f"  -> Searching for mobile apps for '{company_name}' in the UAE region...")
-        documents = []
-
-        # --- Scrape Google Play Store ---
+    def _scrape_google_play(self, company_name):
+        """Searches the Google Play Store and returns a Document for the top result, if any."""
         try:
             # FIX: Removed the unsupported 'gl' argument. 'country' is the correct parameter.
-            search_results = search_play_store(
-                query=company_name,
-                n_hits=config.NO_OF_APPS_TO_SCRAPE,
-                country="ae" 
+            search_results = self.cache.get_or_fetch(
+                f"google-play-search|{company_name}|{config.NO_OF_APPS_TO_SCRAPE}|ae",
+                lambda: search_play_store(
+                    query=company_name,
+                    n_hits=config.NO_OF_APPS_TO_SCRAPE,
+                    country="ae" 
+                )
             )
             
-            if search_results:
-                app_id = search_results[0]['appId']
-                print(f"    -> Found potential Google Play app: {app_id}")
-                details = app_play_store(app_id, lang='en', country='ae')
-                
-                formatted_text = self._format_app_details("Google Play Store", details)
-                documents.append(Document(
-                    page_content=formatted_text,
-                    metadata={"company": company_name, "source": f"google-play-store:{app_id}", "type": "mobile_app"}
-                ))
-                print(f"    ✅ Scraped Google Play Store for '{details.get('title')}'.")
-            else:
+            if not search_results:
                 # FIX: Handle case where no results are returned, as no exception is thrown.
                 print(f"    -> No Google Play app found for '{company_name}'.")
+                return None
+
+            app_id = search_results[0]['appId']
+            print(f"    -> Found potential Google Play app: {app_id}")
+            details = self.cache.get_or_fetch(
+                f"google-play-app|{app_id}|en|ae",
+                lambda: app_play_store(app_id, lang='en', country='ae')
+            )
+            
+            formatted_text = self._format_app_details("Google Play Store", details)
+            print(f"    ✅ Scraped Google Play Store for '{details.get('title')}'.")
+            return Document(
+                page_content=formatted_text,
+                metadata={"company": company_name, "source": f"google-play-store:{app_id}", "type": "mobile_app"}
+            )
 
         except Exception as e:
             # FIX: Broadened exception handling as 'NotFound' is not a valid exception class.
             print(f"    ⚠️ An error occurred during Google Play scraping: {e}")
+            return None
 
-        # --- Scrape Apple App Store ---
+    def _scrape_apple_store(self, company_name):
+        """Searches the Apple App Store and returns a Document for the top result, if any."""
         try:
             search_results = self._search_apple_app_store(
                 term=company_name,
@@ -103,23 +112,43 @@ class AppScraper:
                 limit=config.NO_OF_APPS_TO_SCRAPE
             )
 
-            if search_results:
-                app_details = search_results[0]
-                app_name = app_details.get('trackName')
-                app_id = app_details.get('trackId')
-                print(f"    -> Found potential Apple App Store app: {app_name} ({app_id})")
+            if not search_results:
+                return None
+
+            app_details = search_results[0]
+            app_name = app_details.get('trackName')
+            app_id = app_details.get('trackId')
+            print(f"    -> Found potential Apple App Store app: {app_name} ({app_id})")
 
-                formatted_text = self._format_app_details("Apple App Store", app_details)
-                documents.append(Document(
-                    page_content=formatted_text,
-                    metadata={"company": company_name, "source": f"apple-app-store:{app_id}", "type": "mobile_app"}
-                ))
-                print(f"    ✅ Scraped Apple App Store for '{app_name}'.")
+            formatted_text = self._format_app_details("Apple App Store", app_details)
+            print(f"    ✅ Scraped Apple App Store for '{app_name}'.")
+            return Document(
+                page_content=formatted_text,
+                metadata={"company": company_name, "source": f"apple-app-store:{app_id}", "type": "mobile_app"}
+            )
 
         except Exception as e:
             print(f"    ⚠️ An unexpected error occurred during Apple App Store processing: {e}")
+            return None
+
+    async def _scrape_stores(self, company_name):
+        """Queries both stores concurrently. The store clients are blocking, so each runs in a worker thread."""
+        return await asyncio.gather(
+            asyncio.to_thread(self._scrape_google_play, company_name),
+            asyncio.to_thread(self._scrape_apple_store, company_name),
+            return_exceptions=True
+        )
+
+    def scrape_apps(self, company_name):
+        """
+        Searches both the Google Play Store and Apple App Store for a company's app,
+        scrapes the top result, and returns LangChain Documents.
+        """
+        print(f"  -> Searching for mobile apps for '{company_name}' in the UAE region...")
+        results = asyncio.run(self._scrape_stores(company_name))
+        documents = [doc for doc in results if isinstance(doc, Document)]
 
-        if not documents and len(documents) == 0: # Check if still no documents after both stores
+        if not documents:
             print(f"  -> No mobile apps found for '{company_name}' in either store.")
             
         return documents
@@ -0,0 +1,103 @@
+# modules/brave_search.py
+
+import threading
+import time
+import httpx
+import orjson
+
+import config
+from modules.scrape_cache import ScrapeCache
+
+BRAVE_SEARCH_URL = "https://api.search.brave.com/res/v1/web/search"
+# Statuses worth retrying with backoff (throttling and transient server errors)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 3
+# Number of locks that concurrent searches are spread over, keyed by query
+KEY_LOCK_STRIPES = 64
+
+class RateLimiter:
+    """
+    Spaces calls at least `interval` seconds apart across all threads. A caller only
+    waits when the previous call was too recent, never for a fixed delay.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.next_allowed = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        # Reserve the next free slot under the lock, then sleep outside it, so waiting
+        # callers queue up in order without blocking each other's bookkeeping.
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_allowed)
+            self.next_allowed = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def _build_client():
+    """
+    Creates one long-lived HTTP/2 client for the API. The TLS handshake is paid once and
+    concurrent searches from every worker thread are multiplexed over the same connection.
+    """
+    return httpx.Client(
+        headers={"Accept": "application/json", "X-Subscription-Token": config.BRAVE_API_KEY or ""},
+        timeout=httpx.Timeout(10.0, connect=3.05),
+        limits=httpx.Limits(max_connections=4, max_keepalive_connections=4),
+        # Retries failed connection attempts; throttled responses are retried in _get_results
+        transport=httpx.HTTPTransport(http2=True, retries=MAX_RETRIES),
+    )
+
+_client = _build_client()
+_limiter = RateLimiter(config.BRAVE_API_RATE_LIMIT)
+_cache = ScrapeCache("brave_search", config.SEARCH_CACHE_TTL)
+# A fixed set of locks shared by hash, so concurrent workers asking the same query fetch it
+# only once without keeping a lock alive for every query ever searched
+_key_locks = [threading.Lock() for _ in range(KEY_LOCK_STRIPES)]
+
+def _lock_for(cache_key):
+    return _key_locks[hash(cache_key) % KEY_LOCK_STRIPES]
+
+def _get_results(params):
+    """Calls the API, retrying throttled and failed responses with exponential backoff."""
+    for attempt in range(MAX_RETRIES + 1):
+        _limiter.wait()
+        response = _client.get(BRAVE_SEARCH_URL, params=params)
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            break
+        time.sleep(0.5 * 2 ** attempt)
+    response.raise_for_status()
+    return orjson.loads(response.content).get('web', {}).get('results', [])
+
+def close():
+    """Closes the API connection. Safe to call more than once."""
+    _client.close()
+
+def search_brave(query, count=None, force_refresh=False):
+    """
+    Performs a web search using the Brave Search API and returns the list of web results.
+    Shared by every module that needs search results, so fixes apply in one place.
+    Successful responses are cached on disk so repeated queries skip the API;
+    `force_refresh` bypasses the cache and overwrites the stored results.
+    """
+    if not config.BRAVE_API_KEY:
+        print("⚠️  Brave API key is missing. Skipping real search.")
+        return []
+    params = {"q": query, "country": "US", "search_lang": "en"}
+    if count:
+        params["count"] = count
+
+    cache_key = orjson.dumps(params, option=orjson.OPT_SORT_KEYS).decode()
+    with _lock_for(cache_key):
+        cached_results = None if force_refresh else _cache.get(cache_key)
+        if cached_results is not None:
+            return cached_results
+
+        try:
+            results = _get_results(params)
+            _cache.set(cache_key, results)
+            return results
+        except Exception as e:
+            print(f"❌ An error occurred during Brave Search: {e}")
+            return []
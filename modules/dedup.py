@@ -0,0 +1,33 @@
+# modules/dedup.py
+
+from datasketch import MinHash, MinHashLSH
+
+import config
+
+def _minhash(text, shingle_size=5, num_perm=64):
+    """Builds a MinHash signature over the word n-gram shingles of `text`."""
+    tokens = text.lower().split()
+    shingles = {" ".join(tokens[i:i + shingle_size]) for i in range(max(len(tokens) - shingle_size + 1, 1))}
+    signature = MinHash(num_perm=num_perm)
+    for shingle in shingles:
+        signature.update(shingle.encode("utf-8"))
+    return signature
+
+def deduplicate_documents(documents, threshold=None):
+    """
+    Drops documents whose content is a near-duplicate (estimated Jaccard similarity above
+    `threshold`) of an earlier one, so reposted jobs and syndicated articles are embedded once.
+    """
+    threshold = threshold or config.DEDUP_JACCARD_THRESHOLD
+    lsh = MinHashLSH(threshold=threshold, num_perm=64)
+    unique_documents = []
+    for index, document in enumerate(documents):
+        signature = _minhash(document.page_content)
+        if lsh.query(signature):
+            continue
+        lsh.insert(str(index), signature)
+        unique_documents.append(document)
+
+    if len(unique_documents) < len(documents):
+        print(f"  -> Dropped {len(documents) - len(unique_documents)} near-duplicate document(s).")
+    return unique_documents
@@ -0,0 +1,138 @@
+# modules/driver_factory.py
+
+import atexit
+import queue
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import undetected_chromedriver as uc
+
+import config
+
+# Switches off Chrome subsystems the scrapers never use, trimming start-up time and memory
+BROWSER_ARGUMENTS = (
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-features=IsolateOrigins,site-per-process,Translate,BackForwardCache",
+)
+
+_pool = None
+_pool_lock = threading.Lock()
+# chromedriver binary patched by the first launch, reused by every later browser
+_driver_executable_path = None
+
+def create_driver(block_resources=True, user_data_dir=None):
+    """
+    Launches an undetected Chrome instance. By default, images, fonts, media, stylesheets
+    and analytics trackers are blocked, since only the page text is ever used. Navigation
+    returns at DOMContentLoaded; callers wait explicitly for the elements they need.
+    Pass `user_data_dir` to keep the browser profile (and its logins) on disk between runs.
+    Only the first launch downloads and patches chromedriver; later ones reuse that binary.
+    """
+    options = uc.ChromeOptions()
+    options.page_load_strategy = "eager"
+    if config.BROWSER_HEADLESS:
+        # The new headless mode shares the regular rendering pipeline and starts faster
+        options.add_argument("--headless=new")
+    for argument in BROWSER_ARGUMENTS:
+        options.add_argument(argument)
+    prefs = {"profile.default_content_setting_values.notifications": 2}
+    if block_resources:
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        prefs["profile.managed_default_content_settings.images"] = 2
+    options.add_experimental_option("prefs", prefs)
+
+    global _driver_executable_path
+    driver = uc.Chrome(
+        use_subprocess=True,
+        options=options,
+        user_data_dir=user_data_dir,
+        driver_executable_path=_driver_executable_path
+    )
+    if _driver_executable_path is None:
+        _driver_executable_path = driver.patcher.executable_path
+
+    if block_resources:
+        apply_resource_blocking(driver)
+
+    return driver
+
+def apply_resource_blocking(driver):
+    """
+    Blocks fonts, media, stylesheets and trackers on the browser's current tab. The CDP
+    commands only reach the active target, so call this again on every newly opened tab.
+    """
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": config.BLOCKED_RESOURCE_PATTERNS})
+    except Exception as e:
+        print(f"  ⚠️  Could not enable resource blocking on the browser: {e}")
+
+class DriverPool:
+    """
+    A fixed set of warm browsers shared by every scraper in the process, so Chrome
+    start-up is paid once per run instead of once per scraper.
+    """
+
+    def __init__(self, size):
+        print(f"🚀 Launching a pool of {size} browser(s)...")
+        self.drivers = []
+        self.idle = queue.Queue()
+
+        # The first launch patches the chromedriver binary, so it must not race the others.
+        self._add(create_driver())
+        if size > 1:
+            with ThreadPoolExecutor(max_workers=size - 1) as executor:
+                for driver in executor.map(lambda _: create_driver(), range(size - 1)):
+                    self._add(driver)
+
+    def _add(self, driver):
+        self.drivers.append(driver)
+        self.idle.put(driver)
+
+    def acquire(self):
+        """Takes a browser out of the pool, waiting for one to be released if all are busy."""
+        return self.idle.get()
+
+    def release(self, driver):
+        """Returns a browser to the pool for the next scraper to use."""
+        if driver is not None:
+            self.idle.put(driver)
+
+    @contextmanager
+    def lease(self):
+        """Context manager that holds a pooled browser for the duration of a `with` block."""
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        """Quits every browser in the pool."""
+        for driver in self.drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        self.drivers = []
+        print("\nBrowser pool closed.")
+
+def get_pool(size=None):
+    """Returns the process-wide driver pool, launching it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool(size or config.DRIVER_POOL_SIZE)
+    return _pool
+
+def close_pool():
+    """Quits the shared browsers if they were ever launched. Safe to call more than once."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+# Safety net for runs that end without the orchestrator closing the pool
+atexit.register(close_pool)
@@ -1,17 +1,40 @@
-# modules/job_board_scraper.py
+# modules/job_scraper.py
 
 import time
-import random
-import undetected_chromedriver as uc
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException
-from bs4 import BeautifulSoup
+from selenium.common.exceptions import TimeoutException
+from selectolax.parser import HTMLParser
 from langchain.docstore.document import Document
 
 import config
+from modules.driver_factory import get_pool
+from modules.scrape_cache import ScrapeCache
+from modules.dedup import deduplicate_documents
+
+# HTTP statuses that mean the board wants a real browser (bot challenge or throttling)
+BROWSER_REQUIRED_STATUSES = (403, 429, 503)
+
+# Reads the first N Bayt result links in a single WebDriver round trip
+BAYT_JOB_LINKS_JS = """
+return Array.from(document.querySelectorAll('li[data-js-job] h2 a'))
+    .slice(0, arguments[0])
+    .map(link => link.href);
+"""
+# Reads a Bayt job page's title and description markup in a single WebDriver round trip
+BAYT_JOB_DETAIL_JS = """
+return {
+    title: document.querySelector('h1.h3').innerText,
+    html: document.getElementById('job_description_and_requirements').outerHTML
+};
+"""
+
+# Tags that never carry job content
+NON_CONTENT_TAGS = ["script", "style", "nav", "footer", "header", "aside"]
 
 class JobBoardScraper:
     """
@@ -20,27 +43,31 @@ class JobBoardScraper:
     """
 
     def __init__(self):
-        """Initializes the scraper with a Selenium WebDriver."""
-        options = uc.ChromeOptions()
-        # The next line is optional, it can help in some environments
-        # options.add_argument('--headless') 
-        self.driver = uc.Chrome(use_subprocess=True, options=options)
-        self.wait = WebDriverWait(self.driver, 20) # Increased wait time for more reliability
-
-    def _get_clean_text(self, soup):
-        """Extracts clean, meaningful text from a BeautifulSoup object."""
-        for script_or_style in soup(["script", "style", "nav", "footer", "header", "aside"]):
-            script_or_style.decompose()
-        text = soup.get_text()
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        return "\n".join(chunk for chunk in chunks if chunk)
-
-    def _handle_bayt_popups(self):
+        """
+        Initializes the scraper. Each job board leases its own browser from the shared pool
+        to drive its search form; job pages are fetched over a keep-alive HTTP session.
+        """
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        })
+        self.cache = ScrapeCache("job_postings", config.PAGE_CACHE_TTL)
+
+    def _sync_session_cookies(self, driver):
+        """Copies the browser's cookies (consent, bot-check tokens) into the HTTP session."""
+        for cookie in driver.get_cookies():
+            self.session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'))
+
+    def _get_clean_text(self, node):
+        """Extracts clean, meaningful text from a selectolax node in a single C-level pass."""
+        node.strip_tags(NON_CONTENT_TAGS)
+        return node.text(separator="\n", strip=True)
+
+    def _handle_bayt_popups(self, driver):
         """Handles cookie consent banners on Bayt.com."""
         try:
             # Short wait for the cookie banner
-            cookie_wait = WebDriverWait(self.driver, 5)
+            cookie_wait = WebDriverWait(driver, 5)
             accept_button = cookie_wait.until(EC.element_to_be_clickable((By.ID, 'onetrust-accept-btn-handler')))
             accept_button.click()
             print("      -> Accepted Bayt cookie policy.")
@@ -50,98 +77,128 @@ class JobBoardScraper:
         except Exception as e:
             print(f"      ⚠️  Could not handle Bayt popup: {e}")
 
-    def _scrape_bayt(self, company_name):
+    def _scrape_bayt(self, company_name, limit):
         """
         REVISED: Navigates to Bayt.com, handles popups, uses the search bar,
         and then scrapes the results.
         """
         documents = []
         try:
-            url = "https://www.bayt.com/en/uae/jobs/"
-            print(f"    -> Navigating to Bayt.com to search for '{company_name}'")
-            self.driver.get(url)
-
-            # Handle any popups like cookie consent
-            self._handle_bayt_popups()
-
-            # Find the search input, clear it, type the company name, and submit
-            search_input = self.wait.until(EC.element_to_be_clickable((By.ID, 'text_search')))
-            search_input.clear()
-            search_input.send_keys(f'"{company_name}"')
-            search_input.send_keys(Keys.RETURN)
-            
-            # Wait for search results to load by checking for a known element
-            self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "ul.list.is-basic")))
-            print("      -> Search submitted. Scraping results...")
-
-            job_links = self.driver.find_elements(By.CSS_SELECTOR, 'li[data-js-job] h2 a')
-            urls = [link.get_attribute('href') for link in job_links[:config.NO_OF_JOBS_TO_SCRAPE]]
-
-            if not urls:
-                print(f"      -> No job listings found for '{company_name}' on Bayt.")
-                return []
+            with get_pool().lease() as driver:
+                wait = WebDriverWait(driver, 20) # Increased wait time for more reliability
+                url = "https://www.bayt.com/en/uae/jobs/"
+                print(f"    -> Navigating to Bayt.com to search for '{company_name}'")
+                driver.get(url)
+
+                # Handle any popups like cookie consent
+                self._handle_bayt_popups(driver)
+
+                # Find the search input, clear it, type the company name, and submit
+                search_input = wait.until(EC.element_to_be_clickable((By.ID, 'text_search')))
+                search_input.clear()
+                search_input.send_keys(f'"{company_name}"')
+                search_input.send_keys(Keys.RETURN)
+
+                # Wait for search results to load by checking for a known element
+                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "ul.list.is-basic")))
+                print("      -> Search submitted. Scraping results...")
+
+                urls = driver.execute_script(BAYT_JOB_LINKS_JS, limit)
+
+                if not urls:
+                    print(f"      -> No job listings found for '{company_name}' on Bayt.")
+                    return []
+
+                self._sync_session_cookies(driver)
+                for job_url in urls:
+                    try:
+                        cached_job = self.cache.get(job_url)
+                        if cached_job is not None:
+                            job_title, job_description = cached_job
+                        else:
+                            job_title, job_description = self._fetch_bayt_job(driver, job_url)
+                            self.cache.set(job_url, [job_title, job_description])
+
+                        content = f"Job Title: {job_title}\n\nJob Description:\n{job_description}"
+                        documents.append(Document(
+                            page_content=content,
+                            metadata={"company": company_name, "source": "bayt.com", "type": "job_posting", "url": job_url}
+                        ))
+                        print(f"      ✅ Scraped job: {job_title}")
+                    except Exception as e:
+                        print(f"      ⚠️ Could not scrape job detail from Bayt URL {job_url}: {e}")
 
-            for job_url in urls:
-                try:
-                    self.driver.get(job_url)
-                    self.wait.until(EC.presence_of_element_located((By.ID, 'job_description_and_requirements')))
-                    
-                    title_element = self.driver.find_element(By.CSS_SELECTOR, 'h1.h3')
-                    job_title = title_element.text.strip()
-                    
-                    desc_element = self.driver.find_element(By.ID, 'job_description_and_requirements')
-                    job_description = self._get_clean_text(BeautifulSoup(desc_element.get_attribute('outerHTML'), 'html.parser'))
-
-                    content = f"Job Title: {job_title}\n\nJob Description:\n{job_description}"
-                    documents.append(Document(
-                        page_content=content,
-                        metadata={"company": company_name, "source": "bayt.com", "type": "job_posting", "url": job_url}
-                    ))
-                    print(f"      ✅ Scraped job: {job_title}")
-                except Exception as e:
-                    print(f"      ⚠️ Could not scrape job detail from Bayt URL {job_url}: {e}")
-                    
         except Exception as e:
             print(f"    ⚠️ Error scraping Bayt for '{company_name}': {e}")
         return documents
 
-    def _scrape_naukri_gulf(self, company_name):
+    def _fetch_bayt_job(self, driver, job_url):
+        """
+        Fetches a Bayt job page over HTTP and returns (title, description). Falls back to
+        the browser when the page is behind a bot challenge or lacks the expected markup.
+        """
+        response = self.session.get(job_url, timeout=15)
+        if response.status_code not in BROWSER_REQUIRED_STATUSES:
+            response.raise_for_status()
+            tree = HTMLParser(response.text)
+            title_element = tree.css_first("h1.h3")
+            desc_element = tree.css_first("#job_description_and_requirements")
+            if title_element and desc_element:
+                return title_element.text(strip=True), self._get_clean_text(desc_element)
+
+        print(f"      -> Falling back to the browser for {job_url}")
+        return self._fetch_bayt_job_with_driver(driver, job_url)
+
+    def _fetch_bayt_job_with_driver(self, driver, job_url):
+        """Loads a Bayt job page in the browser and returns (title, description)."""
+        driver.get(job_url)
+        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.ID, 'job_description_and_requirements')))
+
+        job_detail = driver.execute_script(BAYT_JOB_DETAIL_JS)
+        job_description = self._get_clean_text(HTMLParser(job_detail['html']).body)
+        return job_detail['title'].strip(), job_description
+
+    def _scrape_naukri_gulf(self, company_name, limit):
         """
         REVISED: Navigates to NaukriGulf.com, handles popups, uses the search bar,
         and then scrapes the results.
         """
         documents = []
         try:
-            url = "https://www.naukrigulf.com/jobs-in-uae"
-            print(f"    -> Navigating to NaukriGulf to search for '{company_name}'")
-            self.driver.get(url)
-
-            # Find search input, type company name, and press Enter
-            search_input = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "input[placeholder='Skills, Designations, Companies']")))
-            search_input.clear()
-            search_input.send_keys(f'"{company_name}"')
-            
-            # Click the search button
-            search_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//button[text()='Search']")))
-            search_button.click()
-
-            # Wait for results to load
-            self.wait.until(EC.presence_of_element_located((By.CLASS_NAME, "job-card-container")))
-            print("      -> Search submitted. Scraping results...")
-
-            job_cards = self.driver.find_elements(By.CLASS_NAME, 'job-card-container')[:config.NO_OF_JOBS_TO_SCRAPE]
-            
+            with get_pool().lease() as driver:
+                wait = WebDriverWait(driver, 20) # Increased wait time for more reliability
+                url = "https://www.naukrigulf.com/jobs-in-uae"
+                print(f"    -> Navigating to NaukriGulf to search for '{company_name}'")
+                driver.get(url)
+
+                # Find search input, type company name, and press Enter
+                search_input = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "input[placeholder='Skills, Designations, Companies']")))
+                search_input.clear()
+                search_input.send_keys(f'"{company_name}"')
+
+                # Click the search button
+                search_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[text()='Search']")))
+                search_button.click()
+
+                # Wait for results to load
+                wait.until(EC.presence_of_element_located((By.CLASS_NAME, "job-card-container")))
+                print("      -> Search submitted. Scraping results...")
+
+                # Parse the whole result page once instead of one WebDriver round trip per card
+                page_tree = HTMLParser(driver.page_source)
+
+            job_cards = page_tree.css(".job-card-container")[:limit]
+
             if not job_cards:
                 print(f"      -> No job listings found for '{company_name}' on NaukriGulf.")
                 return []
 
             for card in job_cards:
                 try:
-                    soup = BeautifulSoup(card.get_attribute('outerHTML'), 'html.parser')
-                    job_title_element = soup.select_one('h2.job-card-title')
-                    job_title = job_title_element.text.strip() if job_title_element else "N/A"
-                    
-                    job_description = self._get_clean_text(soup)
+                    job_title_element = card.css_first("h2.job-card-title")
+                    job_title = job_title_element.text(strip=True) if job_title_element else "N/A"
+
+                    job_description = self._get_clean_text(card)
 
                     content = f"Job Title: {job_title}\n\nJob Information:\n{job_description}"
                     documents.append(Document(
@@ -156,23 +213,33 @@ class JobBoardScraper:
             print(f"    ⚠️ Error scraping NaukriGulf for '{company_name}': {e}")
         return documents
 
-    def scrape_jobs(self, company_name):
+    def scrape_jobs(self, company_name, jobs_already_found=0):
         """
-        Iterates through configured job boards and scrapes job postings.
+        Scrapes all configured job boards concurrently, each in its own pooled browser.
+        `jobs_already_found` counts postings already collected elsewhere (the LinkedIn jobs tab);
+        the boards are only asked for the remainder and skipped once the target is met.
         """
+        remaining = config.NO_OF_JOBS_TO_SCRAPE - jobs_already_found
+        if remaining <= 0:
+            print(f"  -> LinkedIn already provided {jobs_already_found} job postings for '{company_name}'. Skipping job boards.")
+            return []
+
         print(f"  -> Searching for job postings for '{company_name}'...")
         all_documents = []
-        
-        all_documents.extend(self._scrape_bayt(company_name))
-        all_documents.extend(self._scrape_naukri_gulf(company_name))
+
+        board_scrapers = (self._scrape_bayt, self._scrape_naukri_gulf)
+        with ThreadPoolExecutor(max_workers=min(config.PARALLEL_WORKERS, len(board_scrapers))) as executor:
+            futures = [executor.submit(scrape, company_name, remaining) for scrape in board_scrapers]
+            for future in as_completed(futures):
+                all_documents.extend(future.result())
 
         if not all_documents:
             print(f"  -> No job postings found for '{company_name}' on the targeted boards.")
-            
-        return all_documents
+
+        # The same posting is often listed on several boards with minor wording changes
+        return deduplicate_documents(all_documents)
 
     def close(self):
-        """Closes the Selenium driver."""
-        if self.driver:
-            self.driver.quit()
-            print("\nBrowser for job board scraping closed.")
+        """Closes the HTTP session. Browsers belong to the shared pool and stay open."""
+        self.session.close()
+        print("\nJob board scraper session closed.")
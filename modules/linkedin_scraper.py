@@ -1,34 +1,105 @@
 # modules/linkedin_scraper.py
 
+import atexit
 import json
+import os
 import time
 import random
-import undetected_chromedriver as uc
+import threading
+import requests
+import orjson
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from langchain.docstore.document import Document
 
 import config
+from modules.driver_factory import create_driver, apply_resource_blocking
+from modules.scrape_cache import ScrapeCache
 
-class LinkedInScraper:
-    """Scrapes data from LinkedIn company pages and returns LangChain Documents."""
+VOYAGER_COMPANIES_URL = "https://www.linkedin.com/voyager/api/organization/companies"
+# Voyager statuses that mean the session is logged out or throttled
+VOYAGER_FALLBACK_STATUSES = (401, 429)
+POST_TEXT_SELECTOR = "div.update-components-text"
+
+# Clicks every "see more" toggle, waits until the expanded text renders (at most 2 s),
+# then returns the innerText of the first N posts. Runs via execute_async_script.
+EXPAND_AND_READ_POSTS_JS = """
+const [limit, selector, done] = arguments;
+const read = () => done(Array.from(document.querySelectorAll(selector))
+    .slice(0, limit)
+    .map(post => post.innerText));
+const buttons = document.querySelectorAll('.update-components-text__see-more');
+if (!buttons.length) { read(); return; }
+
+// Read once every "see more" button is gone, or once the DOM has been quiet for a moment,
+// so posts that expand on a later mutation are not read while still truncated.
+let finished = false;
+let quietTimer = null;
+const finish = () => {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(quietTimer);
+    read();
+};
+const observer = new MutationObserver(() => {
+    if (!document.querySelector('.update-components-text__see-more')) { finish(); return; }
+    clearTimeout(quietTimer);
+    quietTimer = setTimeout(finish, 300);
+});
+observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+buttons.forEach(button => button.click());
+setTimeout(finish, 2000);
+"""
+
+class LinkedInSessionManager:
+    """
+    Logs into LinkedIn once per process and shares the authenticated browser, plus an HTTP
+    session carrying the same cookies, with every LinkedInScraper.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls):
+        """Returns the process-wide session manager, logging in on first use."""
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                atexit.register(cls._instance.close)
+        return cls._instance
 
     def __init__(self):
         self.driver = self._setup_driver_with_cookies()
+        self.session = self._build_http_session() if self.driver else None
 
     def _setup_driver_with_cookies(self):
-        """Initializes a browser and logs in using a cookie file."""
-        print("🚀 Initializing WebDriver and loading cookies for LinkedIn...")
+        """
+        Initializes a browser on the persistent LinkedIn profile. A profile from a previous run is
+        usually still logged in; otherwise the session is bootstrapped from the cookie file.
+        """
+        print("🚀 Initializing WebDriver for LinkedIn...")
+        profile_exists = os.path.isdir(os.path.join(config.LINKEDIN_PROFILE_DIR, "Default"))
+        driver = create_driver(user_data_dir=os.path.abspath(config.LINKEDIN_PROFILE_DIR))
+
+        if profile_exists:
+            print("  -> Reusing the saved LinkedIn browser profile.")
+            if self._open_feed(driver):
+                print("✅ Successfully logged into LinkedIn.")
+                return driver
+            print("  -> Saved profile is logged out. Falling back to the cookie file.")
+
         try:
             with open(config.COOKIES_FILE, "r") as f:
                 cookies = json.load(f)
         except FileNotFoundError:
             print(f"\n❌ FATAL ERROR: {config.COOKIES_FILE} not found. Please run cookie_generator.py first.")
+            driver.quit()
             return None
         
-        driver = uc.Chrome(use_subprocess=True)
         driver.get("https://www.linkedin.com/")
         for cookie in cookies:
             if 'expiry' in cookie:
@@ -36,10 +107,7 @@ class LinkedInScraper:
             driver.add_cookie(cookie)
         
         print("  -> Cookies loaded into browser.")
-        driver.get("https://www.linkedin.com/feed/")
-        WebDriverWait(driver, 15).until(lambda d: "Feed" in d.title or "Sign In" in d.title)
-        
-        if "Feed" not in driver.title:
+        if not self._open_feed(driver):
             print("❌ LOGIN FAILED. Cookies might be invalid or expired.")
             driver.quit()
             return None
@@ -47,9 +115,129 @@ class LinkedInScraper:
         print("✅ Successfully logged into LinkedIn.")
         return driver
 
+    @staticmethod
+    def _open_feed(driver):
+        """Opens the LinkedIn feed and reports whether the browser is logged in."""
+        driver.get("https://www.linkedin.com/feed/")
+        try:
+            WebDriverWait(driver, 15).until(lambda d: "Feed" in d.title or "Sign In" in d.title)
+        except TimeoutException:
+            return False
+        return "Feed" in driver.title
+
+    def _build_http_session(self):
+        """Creates a requests session authenticated with the logged-in browser's cookies."""
+        session = requests.Session()
+        for cookie in self.driver.get_cookies():
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'))
+        session.headers.update({
+            "User-Agent": self.driver.execute_script("return navigator.userAgent;"),
+            "csrf-token": (session.cookies.get("JSESSIONID") or "").strip('"'),
+            "x-restli-protocol-version": "2.0.0",
+        })
+        return session
+
+    def close(self):
+        """Closes the HTTP session and the browser."""
+        if self.session:
+            self.session.close()
+            self.session = None
+        if self.driver:
+            self.driver.quit()
+            self.driver = None
+            print("\nLinkedIn browser closed.")
+
+def close_linkedin_session():
+    """Quits the shared LinkedIn browser if it was ever started. Safe to call more than once."""
+    with LinkedInSessionManager._lock:
+        if LinkedInSessionManager._instance is not None:
+            LinkedInSessionManager._instance.close()
+            LinkedInSessionManager._instance = None
+
+class LinkedInScraper:
+    """Scrapes data from LinkedIn company pages and returns LangChain Documents."""
+
+    def __init__(self, session_manager=None):
+        self.session_manager = session_manager or LinkedInSessionManager.get()
+        self.driver = self.session_manager.driver
+        self.session = self.session_manager.session
+        self.pages_scraped = 0
+        self.cache = ScrapeCache("linkedin_companies", config.PAGE_CACHE_TTL)
+
     def _human_like_delay(self):
         time.sleep(random.uniform(2.5, 4.5))
 
+    def _count_posts(self):
+        return len(self.driver.find_elements(By.CSS_SELECTOR, POST_TEXT_SELECTOR))
+
+    def _scroll_for_posts(self, scrolls=2):
+        """
+        Scrolls the feed, moving on as soon as new posts render instead of sleeping
+        for a fixed time. Stops early once the feed stops growing.
+        """
+        loaded = self._count_posts()
+        for _ in range(scrolls):
+            if loaded >= config.NO_OF_POSTS_TO_SCRAPE:
+                break
+            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            try:
+                WebDriverWait(self.driver, 6).until(lambda d: self._count_posts() > loaded)
+            except TimeoutException:
+                break
+            loaded = self._count_posts()
+
+    def _fetch_about_from_api(self, company_url):
+        """
+        Fetches the company profile from LinkedIn's Voyager API, a few KB of JSON instead
+        of the fully rendered 'About' page. Profiles are cached by company slug.
+        Returns None if the API call does not succeed.
+        """
+        if not self.session:
+            return None
+        slug = company_url.split('/company/', 1)[1].split('/')[0]
+        about_text = self.cache.get(slug)
+        if about_text is not None:
+            print(f"    -> Using cached LinkedIn profile for '{slug}'.")
+            return about_text
+
+        try:
+            response = self.session.get(
+                VOYAGER_COMPANIES_URL,
+                params={"q": "universalName", "universalName": slug},
+                timeout=15
+            )
+            if response.status_code in VOYAGER_FALLBACK_STATUSES:
+                print(f"    -> Voyager API returned {response.status_code} for '{slug}'. Using the rendered page.")
+                return None
+            response.raise_for_status()
+            elements = orjson.loads(response.content).get("elements", [])
+        except Exception as e:
+            print(f"    -> Voyager API unavailable for '{slug}' ({e}). Using the rendered page.")
+            return None
+        if not elements:
+            return None
+
+        about_text = self._format_company(elements[0])
+        if about_text:
+            self.cache.set(slug, about_text)
+        return about_text
+
+    @staticmethod
+    def _format_company(company):
+        """Turns a Voyager company record into readable 'About' text."""
+        industries = company.get("industries") or [
+            industry.get("localizedName") for industry in company.get("companyIndustries", [])
+        ]
+        parts = [
+            company.get("name"),
+            company.get("tagline"),
+            company.get("description"),
+            f"Industries: {', '.join(filter(None, industries))}" if any(industries) else None,
+            f"Specialties: {', '.join(company['specialities'])}" if company.get("specialities") else None,
+            f"Employees on LinkedIn: {company['staffCount']}" if company.get("staffCount") else None,
+        ]
+        return "\n".join(part for part in parts if part) or None
+
     def scrape_page(self, company_name, company_url):
         """Scrapes LinkedIn and returns a list of LangChain Document objects."""
         if not self.driver:
@@ -61,67 +249,105 @@ class LinkedInScraper:
             print(f"    ⚠️  Invalid or missing LinkedIn URL for '{company_name}'. Skipping.")
             return []
 
+        # Pause between companies rather than between scrolls, so the session still looks human
+        if self.pages_scraped:
+            self._human_like_delay()
+        self.pages_scraped += 1
+
         documents = []
         wait = WebDriverWait(self.driver, 10)
+        about_text = self._fetch_about_from_api(company_url)
+
+        # Start every page that needs the browser at once, each in its own tab, so they load
+        # concurrently; each section below then only switches to its already-loading tab.
+        section_urls = {
+            "posts": company_url.rstrip('/') + '/posts/',
+            "jobs": company_url.rstrip('/') + '/jobs/',
+        }
+        if not about_text:
+            section_urls["about"] = company_url.rstrip('/') + '/about/'
+        home_handle = self.driver.current_window_handle
+        tabs = self._open_tabs(section_urls)
         
-        # Scrape 'About' page
         try:
-            about_url = company_url.rstrip('/') + '/about/'
-            self.driver.get(about_url)
-            wait.until(EC.visibility_of_element_located((By.TAG_NAME, "h1")))
-            about_text = self.driver.find_element(By.TAG_NAME, 'body').text
-            documents.append(Document(
+            documents.extend(self._scrape_about(company_name, company_url, about_text, tabs, wait))
+            documents.extend(self._scrape_posts(company_name, company_url, tabs, wait))
+            documents.extend(self._scrape_jobs(company_name, company_url, tabs, wait))
+        finally:
+            self._close_tabs(tabs, home_handle)
+            
+        return documents
+
+    def _open_tabs(self, section_urls):
+        """Opens each URL in a new tab without waiting for it to load. Returns {section: window handle}."""
+        tabs = {}
+        for section, url in section_urls.items():
+            try:
+                self.driver.switch_to.new_window('tab')
+                # A new tab is a new CDP target and does not inherit the launch-time blocking
+                apply_resource_blocking(self.driver)
+                self.driver.execute_script("window.location.href = arguments[0];", url)
+                tabs[section] = self.driver.current_window_handle
+            except Exception as e:
+                print(f"    ⚠️ Could not open a tab for {url}: {e}")
+        return tabs
+
+    def _close_tabs(self, tabs, home_handle):
+        """Closes the per-section tabs and returns to the original one."""
+        for handle in tabs.values():
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except Exception:
+                pass
+        self.driver.switch_to.window(home_handle)
+
+    def _scrape_about(self, company_name, company_url, about_text, tabs, wait):
+        """Returns the 'About' Document, from the JSON API when possible and the rendered page otherwise."""
+        try:
+            if not about_text:
+                self.driver.switch_to.window(tabs["about"])
+                wait.until(EC.visibility_of_element_located((By.TAG_NAME, "h1")))
+                about_text = self.driver.find_element(By.TAG_NAME, 'body').text
+            print("    ✅ Scraped 'About' page.")
+            return [Document(
                 page_content=about_text,
                 metadata={"company": company_name, "source": company_url, "type": "about"}
-            ))
-            print("    ✅ Scraped 'About' page.")
+            )]
         except Exception:
             print("    ⚠️ Could not scrape 'About' page.")
-        
-        # Scrape 'Posts' page
+            return []
+
+    def _scrape_posts(self, company_name, company_url, tabs, wait):
+        """Returns the company's recent posts as Documents."""
         try:
-            posts_url = company_url.rstrip('/') + '/posts/'
-            self.driver.get(posts_url)
+            self.driver.switch_to.window(tabs["posts"])
             wait.until(EC.presence_of_element_located((By.CLASS_NAME, "scaffold-finite-scroll__content")))
-            for _ in range(2):
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                self._human_like_delay()
-            post_elements = self.driver.find_elements(By.XPATH, "//div[contains(@class, 'update-components-text')]")[:config.NO_OF_POSTS_TO_SCRAPE]
-            for post in post_elements:
-                try:
-                    more_button = post.find_element(By.CSS_SELECTOR, ".update-components-text__see-more")
-                    self.driver.execute_script("arguments[0].click();", more_button)
-                    time.sleep(0.5)
-                except NoSuchElementException: pass
-            
-            for post in post_elements:
-                documents.append(Document(
-                    page_content=post.text,
-                    metadata={"company": company_name, "source": company_url, "type": "post"}
-                ))
-            print(f"    ✅ Scraped {len(post_elements)} posts.")
+            self._scroll_for_posts()
+            # Expand every post and read all post texts in a single WebDriver round trip
+            post_texts = self.driver.execute_async_script(
+                EXPAND_AND_READ_POSTS_JS, config.NO_OF_POSTS_TO_SCRAPE, POST_TEXT_SELECTOR
+            )
+            print(f"    ✅ Scraped {len(post_texts)} posts.")
+            return [Document(
+                page_content=post_text,
+                metadata={"company": company_name, "source": company_url, "type": "post"}
+            ) for post_text in post_texts]
         except Exception:
             print("    -> No posts section found or error during scraping.")
+            return []
 
-        # Scrape 'Jobs' page
+    def _scrape_jobs(self, company_name, company_url, tabs, wait):
+        """Returns the company's open roles from the jobs tab as Documents."""
         try:
-            jobs_url = company_url.rstrip('/') + '/jobs/'
-            self.driver.get(jobs_url)
+            self.driver.switch_to.window(tabs["jobs"])
             wait.until(EC.presence_of_element_located((By.CLASS_NAME, 'jobs-search-results-list')))
             job_elements = self.driver.find_elements(By.CSS_SELECTOR, '.job-card-list__title')
-            for job in job_elements:
-                documents.append(Document(
-                    page_content=f"Hiring for: {job.text.strip()}",
-                    metadata={"company": company_name, "source": company_url, "type": "job"}
-                ))
             print(f"    ✅ Scraped {len(job_elements)} jobs.")
+            return [Document(
+                page_content=f"Hiring for: {job.text.strip()}",
+                metadata={"company": company_name, "source": company_url, "type": "job"}
+            ) for job in job_elements]
         except Exception:
             print("    -> No jobs section found or error during scraping.")
-            
-        return documents
-
-    def close(self):
-        """Closes the Selenium driver."""
-        if self.driver:
-            self.driver.quit()
-            print("\nBrowser closed.")
+            return []
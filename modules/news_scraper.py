@@ -1,69 +1,227 @@
 # modules/news_scraper.py
 
-import requests
-import time
-import random
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
+import asyncio
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import httpx
+import trafilatura
+from selectolax.parser import HTMLParser
+from selenium.webdriver.support.ui import WebDriverWait
 from langchain.docstore.document import Document
 
 import config
+from modules.driver_factory import get_pool
+from modules.brave_search import search_brave
+from modules.scrape_cache import ScrapeCache
+from modules.dedup import deduplicate_documents
+
+TRACKING_PARAMS = ('fbclid', 'gclid', 'mc_cid', 'mc_eid')
+# HTTP statuses that mean the site wants a real browser (bot challenge or overload)
+BROWSER_REQUIRED_STATUSES = (403, 503)
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+def _normalize_url(url):
+    """Lowercases the host and drops fragments and tracking parameters so URL variants compare equal."""
+    parts = urlsplit(url)
+    query = urlencode([
+        (key, value) for key, value in parse_qsl(parts.query)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    ])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ''))
+
+def _extract_article_text(html):
+    """
+    Returns the main article text of a page, without menus, ads or footers. Falls back to
+    the whole visible body when the page has no recognizable article.
+    """
+    article_text = trafilatura.extract(html, include_comments=False, include_tables=False, favor_precision=True)
+    if article_text:
+        return article_text
+    body = HTMLParser(html).body
+    if body is None:
+        return None
+    body.strip_tags(["script", "style", "noscript"])
+    return body.text(separator="\n", strip=True)
 
 class NewsScraper:
     """Searches for and scrapes news articles, returning LangChain Documents."""
 
     def __init__(self):
-        self.driver = uc.Chrome(use_subprocess=True)
+        self.seen_urls = self._load_seen_urls()
+        self.cache = ScrapeCache("articles", config.PAGE_CACHE_TTL)
+        self.site_query = " OR ".join([f"site:{site}" for site in config.CREDIBLE_NEWS_SITES])
 
-    def _search_brave(self, query):
-        """Performs a targeted web search using the Brave Search API."""
-        if not config.BRAVE_API_KEY:
-            print("⚠️  Brave API key is missing. Skipping real search.")
-            return []
-        headers = {"Accept": "application/json", "X-Subscription-Token": config.BRAVE_API_KEY}
-        params = {"q": query, "country": "US", "search_lang": "en"}
+    def _load_seen_urls(self):
+        """Loads the (company, URL) pairs ingested by previous runs."""
         try:
-            print(f"  -> Sending API request for query: {query}")
-            response = requests.get("https://api.search.brave.com/res/v1/web/search", headers=headers, params=params)
-            response.raise_for_status()
-            return response.json().get('web', {}).get('results', [])
-        except Exception as e:
-            print(f"❌ An error occurred during Brave Search: {e}")
-            return []
+            with open(config.SEEN_URLS_PATH, "r") as f:
+                return set(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return set()
+
+    def persist_seen(self):
+        """
+        Persists the seen-URL registry so later runs skip already ingested articles.
+        Call only once the articles' vectors are safely saved, or they would be skipped forever.
+        """
+        try:
+            os.makedirs(os.path.dirname(config.SEEN_URLS_PATH), exist_ok=True)
+            with open(config.SEEN_URLS_PATH, "w") as f:
+                json.dump(sorted(self.seen_urls), f)
+        except OSError as e:
+            print(f"⚠️  Could not save seen-URL registry: {e}")
 
     def scrape_articles(self, company_name):
-        """Searches for news and scrapes the top results."""
+        """Searches for news and scrapes the top results not already ingested for this company."""
         print(f"  -> Searching for external news for '{company_name}'...")
         
-        site_query = " OR ".join([f"site:{site}" for site in config.CREDIBLE_NEWS_SITES])
-        query = f'"{company_name}" ({site_query})'
+        query = f'"{company_name}" ({self.site_query})'
         
-        search_results = self._search_brave(query)
+        print(f"  -> Sending API request for query: {query}")
+        # Ask for a few spare results, since some may already be ingested
+        search_results = search_brave(query, count=config.NO_OF_NEWS_ARTICLES_TO_SCRAPE * 2)
+        if len(search_results) < config.NO_OF_NEWS_ARTICLES_TO_SCRAPE:
+            search_results = self._search_each_site(company_name, search_results)
         documents = []
         
         if not search_results:
             print("    -> No news found on credible sites.")
             return []
-            
-        for result in search_results[:config.NO_OF_NEWS_ARTICLES_TO_SCRAPE]:
+
+        urls = []
+        for result in search_results:
+            if len(urls) >= config.NO_OF_NEWS_ARTICLES_TO_SCRAPE:
+                break
             url = result.get("url")
-            if url:
-                try:
-                    print(f"    -> Scraping news article: {url}")
-                    self.driver.get(url)
-                    time.sleep(random.uniform(2, 4))
-                    article_text = self.driver.find_element(By.TAG_NAME, 'body').text
-                    documents.append(Document(
-                        page_content=article_text,
-                        metadata={"company": company_name, "source": url, "type": "news"}
-                    ))
-                except Exception as e:
-                    print(f"    ⚠️ Could not scrape article {url}: {e}")
+            if not url:
+                continue
+            if self._seen_key(company_name, url) in self.seen_urls:
+                print(f"    -> Skipping already ingested article: {url}")
+                continue
+            urls.append(url)
+
+        article_texts = self._fetch_articles(urls)
+        for url in urls:
+            article_text = article_texts.get(url)
+            if article_text:
+                documents.append(Document(
+                    page_content=article_text,
+                    metadata={"company": company_name, "source": url, "type": "news"}
+                ))
+                self.seen_urls.add(self._seen_key(company_name, url))
                     
-        return documents
+        # Syndicated stories appear on several news sites under different URLs
+        return deduplicate_documents(documents)
+
+    def _search_each_site(self, company_name, search_results):
+        """
+        Brave tends to under-rank some sites in long OR queries, so when the combined query
+        comes up short, each credible site is searched on its own and the results are merged.
+        """
+        print("    -> Too few results from the combined query. Searching each news site separately...")
+        known_urls = {result.get("url") for result in search_results}
+        merged_results = list(search_results)
+        for site in config.CREDIBLE_NEWS_SITES:
+            for result in search_brave(f'"{company_name}" site:{site}', count=5):
+                if result.get("url") not in known_urls:
+                    known_urls.add(result.get("url"))
+                    merged_results.append(result)
+            if len(merged_results) >= config.NO_OF_NEWS_ARTICLES_TO_SCRAPE * 2:
+                break
+        return merged_results
+
+    @staticmethod
+    def _seen_key(company_name, url):
+        return f"{company_name}|{_normalize_url(url)}"
+
+    def _fetch_articles(self, urls):
+        """
+        Returns {url: article text} for the given URLs. Cached articles are reused, the rest are
+        fetched concurrently over HTTP, and only pages that need JavaScript or block plain
+        clients are loaded in pooled browsers.
+        """
+        article_texts = {}
+        pending = []
+        for url in urls:
+            cached_text = self.cache.get(_normalize_url(url))
+            if cached_text is not None:
+                print(f"    -> Using cached news article: {url}")
+                article_texts[url] = cached_text
+            else:
+                pending.append(url)
+        if not pending:
+            return article_texts
+
+        browser_urls = []
+        for url, (article_text, needs_browser) in zip(pending, asyncio.run(self._fetch_many(pending))):
+            if needs_browser:
+                browser_urls.append(url)
+            elif article_text:
+                article_texts[url] = article_text
+
+        if browser_urls:
+            with ThreadPoolExecutor(max_workers=config.PARALLEL_WORKERS) as executor:
+                for url, article_text in zip(browser_urls, executor.map(self._fetch_article_with_driver, browser_urls)):
+                    if article_text:
+                        article_texts[url] = article_text
+
+        for url in pending:
+            if url in article_texts:
+                self.cache.set(_normalize_url(url), article_texts[url])
+        return article_texts
+
+    async def _fetch_many(self, urls):
+        """Fetches all URLs concurrently over one pooled HTTP/2 client."""
+        limits = httpx.Limits(max_connections=config.NEWS_HTTP_MAX_CONNECTIONS)
+        async with httpx.AsyncClient(
+            http2=True, follow_redirects=True, timeout=15, limits=limits, headers=HTTP_HEADERS
+        ) as client:
+            # Several results often come from the same news site; don't hit one host too hard
+            host_limits = defaultdict(lambda: asyncio.Semaphore(config.NEWS_HTTP_MAX_PER_HOST))
+            return await asyncio.gather(*(
+                self._fetch_article(client, url, host_limits[urlsplit(url).netloc]) for url in urls
+            ))
+
+    async def _fetch_article(self, client, url, host_limit):
+        """Fetches one article over HTTP. Returns (text, needs_browser)."""
+        print(f"    -> Scraping news article: {url}")
+        try:
+            async with host_limit:
+                response = await client.get(url)
+            if response.status_code in BROWSER_REQUIRED_STATUSES:
+                return None, True
+            response.raise_for_status()
+            # Parse off the event loop so the other downloads keep flowing meanwhile
+            article_text = await asyncio.to_thread(_extract_article_text, response.text)
+            return article_text, not article_text
+        except Exception as e:
+            print(f"    ⚠️ Could not scrape article {url}: {e}")
+            return None, False
+
+    def _fetch_article_with_driver(self, url):
+        """Loads a single article in a pooled browser and returns its text, or None on failure."""
+        try:
+            print(f"    -> Falling back to the browser for {url}")
+            with get_pool().lease() as driver:
+                driver.get(url)
+                # Wait only until the page has finished loading, not for a fixed time
+                WebDriverWait(driver, 10).until(
+                    lambda d: d.execute_script("return document.readyState") == "complete"
+                )
+                html = driver.page_source
+            return _extract_article_text(html)
+        except Exception as e:
+            print(f"    ⚠️ Could not scrape article {url}: {e}")
+            return None
 
     def close(self):
-        """Closes the Selenium driver."""
-        if self.driver:
-            self.driver.quit()
-            print("\nBrowser for news scraping closed.")
+        """
+        Nothing to release: browsers belong to the shared pool and stay open. The seen-URL
+        registry is written separately by persist_seen(), after the knowledge base is saved.
+        """
+        print("\nNews scraper session closed.")
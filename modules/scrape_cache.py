@@ -0,0 +1,79 @@
+# modules/scrape_cache.py
+
+import hashlib
+import os
+import sqlite3
+import time
+from contextlib import closing
+import orjson
+
+import config
+
+class ScrapeCache:
+    """
+    A small on-disk key/value cache backed by SQLite. Each instance covers one namespace
+    with its own time-to-live. Values are stored as JSON, so any plain scraped data can be
+    cached. A broken cache never stops a scrape: errors are reported and treated as misses.
+    """
+
+    # When set (via --refresh-cache), every lookup misses so fresh data overwrites the cache.
+    refresh = False
+
+    def __init__(self, namespace, ttl, path=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.path = path or config.CACHE_DB_PATH
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    "namespace TEXT NOT NULL, key_hash TEXT NOT NULL, fetched_at REAL NOT NULL, value TEXT NOT NULL, "
+                    "PRIMARY KEY (namespace, key_hash))"
+                )
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️  Could not initialize the '{namespace}' cache: {e}")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _hash(key):
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Returns the cached value for `key`, or None if it is missing or expired."""
+        if self.refresh:
+            return None
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    "SELECT fetched_at, value FROM cache WHERE namespace = ? AND key_hash = ?",
+                    (self.namespace, self._hash(key))
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️  Cache read failed for '{self.namespace}': {e}")
+            return None
+        if row is None or time.time() - row[0] > self.ttl:
+            return None
+        return orjson.loads(row[1])
+
+    def set(self, key, value):
+        """Stores `value` under `key`, replacing any previous entry."""
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (namespace, key_hash, fetched_at, value) VALUES (?, ?, ?, ?)",
+                    (self.namespace, self._hash(key), time.time(), orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode())
+                )
+        except sqlite3.Error as e:
+            print(f"⚠️  Cache write failed for '{self.namespace}': {e}")
+
+    def get_or_fetch(self, key, fetch):
+        """Returns the cached value for `key`, calling `fetch()` and caching its result on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = fetch()
+            if value is not None:
+                self.set(key, value)
+        return value
@@ -1,170 +1,329 @@
 # modules/url_finder.py
 
-import requests
-import json
-import time
-import undetected_chromedriver as uc
+import asyncio
+import re
+import threading
+import httpx
+import orjson
+from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
 
 import config
+from modules.driver_factory import create_driver
+from modules.brave_search import search_brave
+from modules.scrape_cache import ScrapeCache
+
+# Phrases LinkedIn and most sites show on a missing page
+UNAVAILABLE_PAGE_MARKERS = ("page isn’t available", "page isn't available", "page was not found")
+# Statuses returned to non-browser clients by sites that block them (999 is LinkedIn's)
+BLOCKED_STATUSES = (403, 429, 999)
+# Bytes of a page read when checking it, enough to contain the error banner
+VERIFY_READ_BYTES = 64 * 1024
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# The two URL-identification tasks. Prompts put these fixed parts first and the per-company
+# search results last, so providers can cache the shared prefix.
+URL_TASKS = {
+    "linkedin": {
+        "query": '"{company_name}" linkedin company profile',
+        "intro": "You are an expert business analyst. Your task is to identify the single, official LinkedIn company page URL for {target} from the search results below.",
+        "instructions": """
+        **CRITICAL INSTRUCTIONS:**
+        1.  **Analyze Brand vs. Formal Name:** The company's common brand name might be simpler than its formal name. For example, for "Al Mashreq Al Islami Finance Company PJSC", the correct page is likely just titled "Mashreq".
+        2.  **Identify Company Pages:** The correct URL must contain `/company/`. The title or snippet often includes follower counts, employee numbers, or the industry (e.g., "Financial Services").
+        3.  **Avoid Incorrect Pages:** Discard personal profiles (e.g., URLs with `/in/`), news articles, or directory listings.
+        4.  **Make a Confident Choice:** Based on all evidence, select the single most probable URL.""",
+        "answer": "the correct URL or null if no confident match is found",
+    },
+    "website": {
+        "query": '"{company_name}" official website',
+        "intro": "You are an expert web analyst. Your task is to identify the single, official corporate website for {target} from the search results below.",
+        "instructions": """
+        **CRITICAL INSTRUCTIONS:**
+        1.  **Identify the Homepage:** The correct URL is the company's own homepage, not a third-party site.
+        2.  **IGNORE Irrelevant Links:** You MUST discard links to news articles (e.g., Zawya, Reuters), business directories (e.g., Wikipedia, Bloomberg profiles), or social media.
+        3.  **Analyze URL and Snippet:** The official website URL is often a clean domain (e.g., `sirajfinance.com`). The snippet will describe the company's own services (e.g., "Siraj Finance offers..."). A news snippet would say "Siraj Finance announced...".
+        4.  **Example:** For "First Abu Dhabi Islamic Finance PJSC", the correct URL is `https://www.bankfab.com/en-ae/islamic-banking`, NOT a news article from zawya.com.""",
+        "answer": "the correct corporate website URL or null if no official site is found",
+    },
+}
+
+def _website_slugs(company_name):
+    """Hostname labels a company's own domain is likely to use, e.g. "siraj-finance" and "sirajfinance"."""
+    name = company_name.lower()
+    slugs = (re.sub(r'[^a-z0-9]+', '', name), re.sub(r'[^a-z0-9]+', '-', name).strip('-'))
+    return [slug for slug in dict.fromkeys(slugs) if slug]
+
+def _format_company_block(company_name, context):
+    return f"""
+        **Company:** "{company_name}"
+
+        **Search Results:**
+        {context}"""
 
 class URLFinder:
     """Finds and verifies LinkedIn and official website URLs using an analytical, LLM-driven approach."""
 
-    def __init__(self, openai_client):
+    def __init__(self, openai_client, js_verify=False):
+        """
+        With `js_verify`, pages that block plain HTTP clients are re-checked in a real browser;
+        otherwise they are accepted, since the URL already came from live search results.
+        """
         self.openai_client = openai_client
+        self.js_verify = js_verify
         self.driver = None
+        # The verification browser is shared, so only one company may drive it at a time
+        self.driver_lock = threading.Lock()
+        self.llm_cache = ScrapeCache("llm_url_answers", config.LLM_CACHE_TTL)
 
-    def _search_brave(self, query):
-        """Performs a web search using the Brave Search API."""
-        if not config.BRAVE_API_KEY:
-            print("⚠️  Brave API key is missing. Skipping real search.")
-            return []
-        headers = {"Accept": "application/json", "X-Subscription-Token": config.BRAVE_API_KEY}
-        params = {"q": query, "country": "US", "search_lang": "en", "count": 15} 
-        try:
-            response = requests.get("https://api.search.brave.com/res/v1/web/search", headers=headers, params=params)
-            response.raise_for_status()
-            return response.json().get('web', {}).get('results', [])
-        except Exception as e:
-            print(f"❌ An error occurred during Brave Search: {e}")
-            return []
+    def _build_prompt(self, task_name, company_name, context):
+        """Builds the single-company prompt, which also serves as that answer's cache key."""
+        task = URL_TASKS[task_name]
+        return f"""
+        {task["intro"].format(target="the company named below")}
+        {task["instructions"]}
+
+        Return a JSON object with one key: "url". The value should be {task["answer"]}.
+        {_format_company_block(company_name, context)}
+        """
+
+    def _build_batch_prompt(self, task_name, items):
+        """Builds one prompt asking for the URLs of several companies at once."""
+        task = URL_TASKS[task_name]
+        company_blocks = "\n".join(_format_company_block(company_name, context) for company_name, context in items)
+        return f"""
+        {task["intro"].format(target="each company listed below")}
+        {task["instructions"]}
+
+        Return a JSON object with one key: "results". Its value is a list with one object per company,
+        each with the keys "company" (the company name exactly as given) and "url" ({task["answer"]}).
+        {company_blocks}
+        """
+
+    def _ask_llm(self, prompt):
+        response = self.openai_client.chat.completions.create(model=config.LLM_MODEL, response_format={"type": "json_object"}, messages=[{"role": "user", "content": prompt}])
+        return orjson.loads(response.choices[0].message.content)
 
-    def _find_linkedin_url_with_llm(self, company_name):
+    def _search_for_url(self, task_name, company_name):
         """
-        Uses a hybrid approach to find the LinkedIn URL.
-        First, it checks the top search result for a high-confidence match.
-        If not found, it uses an analytical LLM prompt on a larger set of results.
+        Searches Brave for a company's LinkedIn page or website.
+        Returns (direct_url, context): a confident URL straight from the results, or the
+        formatted results for the LLM to analyze. Both are None when nothing was found.
         """
-        print(f"  -> Searching for LinkedIn page for '{company_name}'...")
-        query = f'"{company_name}" linkedin company profile'
-        search_results = self._search_brave(query)
+        print(f"  -> Searching for {task_name} URL for '{company_name}'...")
+        search_results = search_brave(URL_TASKS[task_name]["query"].format(company_name=company_name), count=15)
         if not search_results:
-            print("    -> No results from Brave Search.")
-            return None
+            print(f"    -> No results from Brave Search for '{company_name}' ({task_name}).")
+            return None, None
 
-        # --- OPTIMIZATION: Check if the first result is a direct match ---
+        # --- OPTIMIZATION: Check if the first LinkedIn result is a direct match ---
         first_url = search_results[0].get('url', '')
-        if "linkedin.com/company/" in first_url:
+        if task_name == "linkedin" and "linkedin.com/company/" in first_url:
             print(f"    -> High-confidence match found in the first result: {first_url}")
-            return first_url
+            return first_url, None
 
-        # --- FALLBACK: If no direct match, use LLM for deeper analysis ---
-        print("    -> No high-confidence match in top result, using LLM for deeper analysis...")
         context = "".join([f"Result {i+1}:\nTitle: {r.get('title', '')}\nURL: {r.get('url', '')}\nSnippet: {r.get('description', '')}\n\n" for i, r in enumerate(search_results)])
-        
-        prompt = f"""
-        You are an expert business analyst. Your task is to identify the single, official LinkedIn company page URL for "{company_name}" from the search results below.
-        
-        **CRITICAL INSTRUCTIONS:**
-        1.  **Analyze Brand vs. Formal Name:** The company's common brand name might be simpler than its formal name. For example, for "Al Mashreq Al Islami Finance Company PJSC", the correct page is likely just titled "Mashreq".
-        2.  **Identify Company Pages:** The correct URL must contain `/company/`. The title or snippet often includes follower counts, employee numbers, or the industry (e.g., "Financial Services").
-        3.  **Avoid Incorrect Pages:** Discard personal profiles (e.g., URLs with `/in/`), news articles, or directory listings.
-        4.  **Make a Confident Choice:** Based on all evidence, select the single most probable URL.
+        return None, context
 
-        **Search Results:**
-        {context}
-
-        Return a JSON object with one key: "url". The value should be the correct URL or null if no confident match is found.
+    def _identify_batch(self, task_name, items):
         """
-        try:
-            response = self.openai_client.chat.completions.create(model=config.LLM_MODEL, response_format={"type": "json_object"}, messages=[{"role": "user", "content": prompt}])
-            url = json.loads(response.choices[0].message.content).get("url")
-            return url if url and "linkedin.com/company/" in url else None
-        except Exception as e:
-            print(f"    -> An unexpected error occurred during LLM verification: {e}")
-            return None
+        Asks the LLM for the URLs of a batch of (company_name, context) items in one call.
+        Answers are cached per company, so re-runs over the same search results are free.
+        Companies missing from a batch answer are retried one by one. Returns {company_name: url}.
+        """
+        urls = {}
+        pending = []
+        for company_name, context in items:
+            cached_answer = self.llm_cache.get(f"{config.LLM_MODEL}\n{self._build_prompt(task_name, company_name, context)}")
+            if cached_answer is not None:
+                urls[company_name] = cached_answer.get("url")
+            else:
+                pending.append((company_name, context))
 
-    def _find_website_url_with_llm(self, company_name):
-        """Uses Brave Search and an analytical LLM prompt to find the official corporate website."""
-        print(f"  -> Searching for official website for '{company_name}'...")
-        query = f'"{company_name}" official website'
-        search_results = self._search_brave(query)
-        if not search_results:
-            print("    -> No results from Brave Search for website.")
-            return None
+        if len(pending) > 1:
+            print(f"    -> Asking the LLM for {len(pending)} {task_name} URLs in one call...")
+            try:
+                answer = self._ask_llm(self._build_batch_prompt(task_name, pending))
+                by_company = {result.get("company"): result.get("url") for result in answer.get("results", [])}
+                for company_name, context in pending:
+                    if company_name in by_company:
+                        urls[company_name] = by_company[company_name]
+                        self._cache_answer(task_name, company_name, context, by_company[company_name])
+            except Exception as e:
+                print(f"    -> Batched LLM call failed ({e}). Retrying companies one by one.")
 
-        context = "".join([f"Result {i+1}:\nTitle: {r.get('title', '')}\nURL: {r.get('url', '')}\nSnippet: {r.get('description', '')}\n\n" for i, r in enumerate(search_results)])
+        for company_name, context in pending:
+            if company_name in urls:
+                continue
+            try:
+                url = self._ask_llm(self._build_prompt(task_name, company_name, context)).get("url")
+                urls[company_name] = url
+                self._cache_answer(task_name, company_name, context, url)
+            except Exception as e:
+                print(f"    -> An unexpected error occurred during LLM {task_name} identification for '{company_name}': {e}")
+        return urls
 
-        prompt = f"""
-        You are an expert web analyst. Your task is to identify the single, official corporate website for "{company_name}" from the search results below.
+    def _cache_answer(self, task_name, company_name, context, url):
+        self.llm_cache.set(f"{config.LLM_MODEL}\n{self._build_prompt(task_name, company_name, context)}", {"url": url})
 
-        **CRITICAL INSTRUCTIONS:**
-        1.  **Identify the Homepage:** The correct URL is the company's own homepage, not a third-party site.
-        2.  **IGNORE Irrelevant Links:** You MUST discard links to news articles (e.g., Zawya, Reuters), business directories (e.g., Wikipedia, Bloomberg profiles), or social media.
-        3.  **Analyze URL and Snippet:** The official website URL is often a clean domain (e.g., `sirajfinance.com`). The snippet will describe the company's own services (e.g., "Siraj Finance offers..."). A news snippet would say "Siraj Finance announced...".
-        4.  **Example:** For "First Abu Dhabi Islamic Finance PJSC", the correct URL is `https://www.bankfab.com/en-ae/islamic-banking`, NOT a news article from zawya.com.
+    async def _guess_website(self, client, company_name):
+        """
+        Tries the obvious domains for a company (its name as .com, .ae or .sa) with HEAD requests.
+        Returns the first one that answers 200 and stays on a host named after the company, or None.
+        """
+        slugs = _website_slugs(company_name)
+        candidates = [f"https://{slug}.{tld}" for slug in slugs for tld in config.WEBSITE_GUESS_TLDS]
 
-        **Search Results:**
-        {context}
+        async def check(url):
+            try:
+                response = await client.head(url, timeout=5)
+                host = response.url.host.lower().removeprefix("www.")
+                if response.status_code == 200 and host.split(".")[0] in slugs:
+                    return str(response.url)
+            except Exception:
+                pass
+            return None
+
+        # Candidates are checked together but ranked in order, so .com wins over .ae and .sa
+        for website_url in await asyncio.gather(*(check(url) for url in candidates)):
+            if website_url:
+                print(f"    -> Website for '{company_name}' guessed from its name: {website_url}")
+                return website_url
+        return None
 
-        Return a JSON object with one key: "url". The value should be the correct corporate website URL or null if no official site is found.
+    async def _verify_url(self, client, url):
         """
+        Fetches the start of a page over HTTP to check that it's a valid, available page.
+        Returns None when the site blocks plain HTTP clients and `js_verify` is off, since
+        the page could then be neither confirmed nor ruled out.
+        """
+        if not url or not isinstance(url, str):
+            return False
         try:
-            response = self.openai_client.chat.completions.create(model=config.LLM_MODEL, response_format={"type": "json_object"}, messages=[{"role": "user", "content": prompt}])
-            url = json.loads(response.choices[0].message.content).get("url")
-            print(f"    -> LLM identified potential website: {url}")
-            return url
+            async with client.stream("GET", url) as response:
+                if response.status_code in BLOCKED_STATUSES:
+                    if self.js_verify:
+                        return await asyncio.to_thread(self._verify_url_with_driver, url)
+                    print(f"    -> {url} blocks plain HTTP checks ({response.status_code}). Keeping it unverified.")
+                    return None
+                if response.status_code != 200:
+                    return False
+                body = b""
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) >= VERIFY_READ_BYTES:
+                        break
+            page_source = body.decode("utf-8", "ignore").lower()
+            return not any(marker in page_source for marker in UNAVAILABLE_PAGE_MARKERS)
         except Exception as e:
-            print(f"    -> An unexpected error occurred during LLM website identification: {e}")
-            return None
+            print(f"    -> Error while verifying URL {url}: {e}")
+            return False
+
+    def _ensure_driver(self):
+        """
+        Starts a single browser the first time a page needs one. The shared pool is not used,
+        since launching all of its browsers for the odd blocked page would cost far more.
+        """
+        if self.driver is None:
+            print("    -> Starting browser for URL verification...")
+            self.driver = create_driver()
 
-    def _verify_url(self, url):
+    def _verify_url_with_driver(self, url):
         """Visits a URL with Selenium to check if it's a valid, available page."""
-        if not url or not isinstance(url, str):
-            return False
         try:
-            self.driver.get(url)
-            time.sleep(3)
-            page_source = self.driver.page_source.lower()
-            return "page isn’t available" not in page_source and "page was not found" not in page_source
+            with self.driver_lock:
+                self._ensure_driver()
+                self.driver.get(url)
+                # The driver returns at DOMContentLoaded; the error banner is in the initial markup
+                WebDriverWait(self.driver, 5).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+                page_source = self.driver.page_source.lower()
+            return not any(marker in page_source for marker in UNAVAILABLE_PAGE_MARKERS)
         except Exception as e:
             print(f"    -> Error while verifying URL {url}: {e}")
             return False
 
-    def process_companies(self, df):
-        """Iterates through a DataFrame to find and verify LinkedIn and website URLs."""
-        print("\n🚀 Initializing browser for URL verification...")
-        self.driver = uc.Chrome(use_subprocess=True)
-        
-        linkedin_urls = []
-        website_urls = []
-        statuses = []
+    async def _identify_urls(self, task_name, company_names, semaphore):
+        """Searches for every company, then resolves the ambiguous ones with batched LLM calls."""
+        async def search(company_name):
+            async with semaphore:
+                return await asyncio.to_thread(self._search_for_url, task_name, company_name)
+
+        searches = await asyncio.gather(*(search(company_name) for company_name in company_names))
+        urls = {company_name: direct_url for company_name, (direct_url, _) in zip(company_names, searches) if direct_url}
+        needs_llm = [(company_name, context) for company_name, (_, context) in zip(company_names, searches) if context]
+
+        async def identify(batch):
+            async with semaphore:
+                return await asyncio.to_thread(self._identify_batch, task_name, batch)
+
+        batches = [needs_llm[i:i + config.LLM_URL_BATCH_SIZE] for i in range(0, len(needs_llm), config.LLM_URL_BATCH_SIZE)]
+        for batch_urls in await asyncio.gather(*(identify(batch) for batch in batches)):
+            urls.update(batch_urls)
+        return urls
+
+    async def _process_all(self, company_names):
+        """
+        Finds LinkedIn and website URLs for all companies concurrently, then verifies the
+        LinkedIn pages. Brave calls stay paced by the shared rate limiter.
+        """
+        semaphore = asyncio.Semaphore(config.URL_FINDER_CONCURRENCY)
+        unique_names = list(dict.fromkeys(company_names))
+        async with httpx.AsyncClient(follow_redirects=True, timeout=8, headers=HTTP_HEADERS) as client:
+            # --- OPTIMIZATION: A website that resolves from the company name needs no search or LLM call ---
+            guesses = await asyncio.gather(*(self._guess_website(client, company_name) for company_name in unique_names))
+            guessed_websites = {company_name: url for company_name, url in zip(unique_names, guesses) if url}
+            linkedin_urls, website_urls = await asyncio.gather(
+                self._identify_urls("linkedin", unique_names, semaphore),
+                self._identify_urls("website", [name for name in unique_names if name not in guessed_websites], semaphore),
+            )
+            website_urls.update(guessed_websites)
+            verified = await self._verify_linkedin_urls(client, unique_names, linkedin_urls)
 
+        for company_name in unique_names:
+            print(f"    -> Website for '{company_name}': {website_urls.get(company_name)}")
+        return [(*verified[company_name], website_urls.get(company_name)) for company_name in company_names]
+
+    async def _verify_linkedin_urls(self, client, unique_names, linkedin_urls):
+        """Checks that each LinkedIn page exists. Returns {company_name: (linkedin_url, status)}."""
+        async def verify(company_name):
+            linkedin_url = linkedin_urls.get(company_name)
+            if not linkedin_url or "linkedin.com/company/" not in linkedin_url:
+                print(f"    -> No confident LinkedIn URL found for '{company_name}'.")
+                return None, "Not Found"
+            is_available = await self._verify_url(client, linkedin_url)
+            if is_available is None:
+                # Kept for scraping, but marked so it isn't mistaken for a confirmed page
+                print(f"    ⚠️  LinkedIn URL for '{company_name}' could not be verified (blocked): {linkedin_url}")
+                return linkedin_url, "Unverified (blocked)"
+            if is_available:
+                print(f"    ✅ LinkedIn URL for '{company_name}' is valid and page exists: {linkedin_url}")
+                return linkedin_url, "Found"
+            print(f"    ❌ LinkedIn URL for '{company_name}' leads to an unavailable page: {linkedin_url}")
+            return None, "Invalid Page"
+
+        print("\n    -> Verifying LinkedIn page availability...")
+        return dict(zip(unique_names, await asyncio.gather(*(verify(company_name) for company_name in unique_names))))
+
+    def process_companies(self, df):
+        """
+        Finds and verifies LinkedIn and website URLs for every company in a DataFrame.
+        A browser is only started if a page blocks plain HTTP checks and `js_verify` is set.
+        """
         print(f"\n🔎 Starting URL search for {len(df)} companies...")
-        for index, row in df.iterrows():
-            company_name = row['Cleaned Name']
-            print(f"\nProcessing ({index+1}/{len(df)}): {company_name}")
-            
-            # Find LinkedIn URL
-            linkedin_url = self._find_linkedin_url_with_llm(company_name)
-            
-            if linkedin_url:
-                print(f"    -> Found potential LinkedIn URL: {linkedin_url}")
-                print("    -> Verifying page availability...")
-                if self._verify_url(linkedin_url):
-                    print("    ✅ LinkedIn URL is valid and page exists.")
-                    linkedin_urls.append(linkedin_url)
-                    statuses.append("Found")
-                else:
-                    print("    ❌ LinkedIn URL leads to an unavailable page.")
-                    linkedin_urls.append(None)
-                    statuses.append("Invalid Page")
-            else:
-                print("    -> No confident LinkedIn URL found by LLM.")
-                linkedin_urls.append(None)
-                statuses.append("Not Found")
-
-            # Find Website URL
-            website_url = self._find_website_url_with_llm(company_name)
-            website_urls.append(website_url)
-            
-            time.sleep(1)
-
-        if self.driver:
-            self.driver.quit()
-
-        df['linkedin_url'] = linkedin_urls
-        df['website_url'] = website_urls
-        df['status'] = statuses
+        try:
+            results = asyncio.run(self._process_all(df['Cleaned Name'].tolist()))
+        finally:
+            if self.driver is not None:
+                try:
+                    self.driver.quit()
+                except Exception:
+                    pass
+                self.driver = None
+
+        df['linkedin_url'] = [linkedin_url for linkedin_url, _, _ in results]
+        df['website_url'] = [website_url for _, _, website_url in results]
+        df['status'] = [status for _, status, _ in results]
         return df
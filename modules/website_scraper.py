@@ -1,60 +1,113 @@
 # modules/website_scraper.py
 
+import asyncio
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-import time
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import httpx
+from collections import deque
+try:
+    # Lexbor is selectolax's faster, fully HTML5-compliant backend
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    from selectolax.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit, urlunsplit
 import random
+import time
 import re
-import os
 import fitz # PyMuPDF
 from langchain.docstore.document import Document
 
 import config
 
+# Tags that never carry page content
+NON_CONTENT_TAGS = ["script", "style", "nav", "footer", "header", "aside", "form"]
+# Links that never lead to another crawlable page
+SKIPPED_HREF_PREFIXES = ("mailto:", "tel:", "javascript:", "#")
+# Runs of spaces/tabs, and line breaks with any blank lines and indentation around them
+HORIZONTAL_WHITESPACE_PATTERN = re.compile(r'[ \t]+')
+LINE_BREAK_PATTERN = re.compile(r'\s*\n\s*')
+# PDFs announced as smaller than this are read in one call; larger or unsized ones are streamed
+PDF_SINGLE_READ_MAX_BYTES = 32 * 1024 * 1024
+
+# Company sites are crawled without certificate checks by default, so the warning urllib3
+# would raise on every such request is silenced once for the whole process.
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# Paths that describe the company itself, crawled ahead of everything else
+PRIORITY_PATH_KEYWORDS = ("/about", "/company", "/contact", "/products", "/services")
+# Archive and pagination URLs that multiply without adding new content
+CRAWL_TRAP_MARKERS = ("/tag/", "/page/", "?p=")
+# Query strings longer than this usually belong to search or tracking URLs
+MAX_QUERY_LENGTH = 64
+
 class WebsiteScraper:
     """
     REVISED: Scrapes data from a company's official website in two distinct stages.
     It now chunks PDF text by page to improve analysis and bypasses SSL errors.
+    Companies are crawled concurrently over one shared HTTP client, several pages at a time.
     """
 
-    def __init__(self):
-        """Initializes the scraper with standard headers."""
+    def __init__(self, ca_bundle=None):
+        """
+        Initializes the scraper with standard headers and a keep-alive session for PDF downloads.
+        SSL certificates are not verified unless `ca_bundle` (a CA bundle path) is given.
+        """
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        # Pages go through the async client; PDFs are downloaded over this pooled keep-alive session
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        # FIX: Many company sites serve broken certificate chains, so verification is off by default.
+        self.ssl_verify = ca_bundle or False
+        self.session.verify = self.ssl_verify
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=Retry(total=3, backoff_factor=0.3))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.high_value_keywords = ['investor', 'relation', 'press', 'media', 'news', 'report', 'annual', 'financial']
-        self.temp_pdf_dir = "temp_pdfs"
-        if not os.path.exists(self.temp_pdf_dir):
-            os.makedirs(self.temp_pdf_dir)
+        # All keywords as whole words in one precompiled pattern, so each link text is scanned once
+        self.keyword_pattern = re.compile(r'\b(?:' + '|'.join(map(re.escape, self.high_value_keywords)) + r')\b', re.IGNORECASE)
+        # Earliest monotonic time the next request may be sent to each host
+        self.host_next_fetch = {}
         
         self.excluded_domains = [
             'linkedin.com', 'twitter.com', 'facebook.com', 'instagram.com', 
             'youtube.com', 't.me', 'tiktok.com'
         ]
 
+    @staticmethod
+    def _canonical_url(url):
+        """
+        Normalizes a URL so trivial variants (host case, trailing slash, empty query,
+        fragment) map to one key and are only crawled once.
+        """
+        parts = urlsplit(url)
+        return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path.rstrip('/') or '/', parts.query, ''))
+
     def _is_valid_url(self, url, base_domain):
-        """Checks if a URL is valid and belongs to the same domain."""
-        parsed_url = urlparse(url)
-        return bool(parsed_url.scheme) and bool(parsed_url.netloc) and parsed_url.netloc == base_domain
-
-    def _get_clean_text(self, soup):
-        """Extracts clean, meaningful text from a BeautifulSoup object."""
-        for script_or_style in soup(["script", "style", "nav", "footer", "header", "aside"]):
-            script_or_style.decompose()
-        text = soup.get_text()
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        return "\n".join(chunk for chunk in chunks if chunk)
-
-    def _extract_text_chunks_from_pdf(self, pdf_path, pdf_url):
-        """
-        REVISED: Extracts text from a PDF and returns it as a list of Document objects,
+        """Checks if an absolute URL is an http(s) URL on the same domain, without parsing it."""
+        for scheme in ("https://", "http://"):
+            if url.startswith(scheme + base_domain):
+                rest = url[len(scheme) + len(base_domain):]
+                return not rest or rest[0] in "/?"
+        return False
+
+    def _get_clean_text(self, tree):
+        """Extracts clean, meaningful text from a page parsed with selectolax."""
+        tree.strip_tags(NON_CONTENT_TAGS)
+        text = tree.body.text(separator="\n") if tree.body else ""
+        # Collapse whitespace in two C-level passes instead of a per-line Python loop
+        text = HORIZONTAL_WHITESPACE_PATTERN.sub(" ", text)
+        return LINE_BREAK_PATTERN.sub("\n", text).strip()
+
+    def _extract_text_chunks_from_pdf(self, doc, pdf_url):
+        """
+        REVISED: Extracts text from an open PDF and returns it as a list of Document objects,
         one for each page (chunking).
         """
         documents = []
         try:
-            doc = fitz.open(pdf_path)
             for page_num, page in enumerate(doc):
                 text = page.get_text()
                 if text.strip(): # Only add pages with actual text content
@@ -66,32 +119,33 @@ class WebsiteScraper:
                             "page": page_num + 1
                         }
                     ))
-            doc.close()
             return documents
         except Exception as e:
-            print(f"      ⚠️  Could not extract text from PDF {pdf_path}: {e}")
+            print(f"      ⚠️  Could not extract text from PDF {pdf_url}: {e}")
             return []
 
     def _scrape_pdf(self, company_name, pdf_url):
         """
-        REVISED: Downloads a PDF, extracts its text page-by-page (chunks), 
-        and returns a list of Documents.
+        REVISED: Downloads a PDF into memory, extracts its text page-by-page (chunks),
+        and returns a list of Documents. Nothing is written to disk.
         """
         try:
             print(f"    -> Found PDF document: {pdf_url}")
-            # FIX: Added verify=False to ignore SSL certificate verification errors.
-            response = requests.get(pdf_url, headers=self.headers, timeout=30, stream=True, verify=False)
+            response = self.session.get(pdf_url, timeout=30, stream=True)
             response.raise_for_status()
             
-            pdf_filename = os.path.join(self.temp_pdf_dir, pdf_url.split('/')[-1])
-            with open(pdf_filename, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            content_length = response.headers.get("Content-Length", "")
+            if content_length.isdigit() and int(content_length) < PDF_SINGLE_READ_MAX_BYTES:
+                pdf_bytes = response.content
+            else:
+                pdf_bytes = bytearray()
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    pdf_bytes.extend(chunk)
             
             print(f"      -> Downloaded. Now extracting text chunks by page...")
-            # Pass the original URL for metadata
-            pdf_docs = self._extract_text_chunks_from_pdf(pdf_filename, pdf_url)
-            os.remove(pdf_filename)
+            # PyMuPDF reads the PDF straight from the downloaded bytes; pass the original URL for metadata
+            with fitz.open(stream=bytes(pdf_bytes), filetype="pdf") as doc:
+                pdf_docs = self._extract_text_chunks_from_pdf(doc, pdf_url)
 
             if pdf_docs:
                 # Add company name to metadata of each page document
@@ -106,37 +160,164 @@ class WebsiteScraper:
         return []
 
 
-    def _find_links(self, soup, base_url, base_domain, only_high_value=False):
+    def _find_links(self, tree, base_url, base_domain, only_high_value=False):
         """Finds links on a page, optionally filtering for high-value ones."""
         links = set()
-        for link in soup.find_all('a', href=True):
-            absolute_link = urljoin(base_url, link['href']).split('#')[0]
-            if not self._is_valid_url(absolute_link, base_domain):
+        for link in tree.css('a[href]'):
+            href = (link.attributes.get('href') or '').strip()
+            if not href or href.startswith(SKIPPED_HREF_PREFIXES):
+                continue
+            absolute_link = self._canonical_url(urljoin(base_url, href))
+            if not self._is_valid_url(absolute_link, base_domain) or self._is_crawl_trap(absolute_link):
                 continue
 
             if only_high_value:
-                link_text = link.get_text().lower()
-                link_href = link['href'].lower()
-                is_pdf = link_href.endswith('.pdf')
-                has_keyword = any(re.search(r'\b' + keyword + r'\b', link_text) for keyword in self.high_value_keywords) or \
-                              any(keyword in link_href for keyword in self.high_value_keywords)
-                
-                if is_pdf or has_keyword:
+                link_href = href.lower()
+                # The href checks are cheap, so the link text is only read when they fail
+                if link_href.endswith('.pdf') or any(keyword in link_href for keyword in self.high_value_keywords) or \
+                   self.keyword_pattern.search(link.text()):
                     links.add(absolute_link)
             else:
                 links.add(absolute_link)
         return links
 
-    def scrape_website(self, company_name, base_url):
+    def _is_crawl_trap(self, url):
+        """Checks for tag archives, pagination and long query strings."""
+        lowered = url.lower()
+        return any(marker in lowered for marker in CRAWL_TRAP_MARKERS) or len(url.partition('?')[2]) > MAX_QUERY_LENGTH
+
+    def _enqueue_links(self, frontier, queued_urls, links):
+        """
+        Adds new links to the breadth-first frontier. Pages about the company itself jump
+        the queue, so they are reached before the crawl budget runs out.
+        """
+        for link in links:
+            if link in queued_urls:
+                continue
+            queued_urls.add(link)
+            path = urlsplit(link).path.lower()
+            if any(keyword in path for keyword in PRIORITY_PATH_KEYWORDS):
+                frontier.appendleft(link)
+            else:
+                frontier.append(link)
+
+    async def _fetch_page(self, client, url):
+        """
+        Fetches one HTML page. Only the first WEBSITE_MAX_PAGE_BYTES are read;
+        returns None for responses that aren't HTML.
+        """
+        await self._wait_for_host(urlsplit(url).netloc)
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+            if "html" not in response.headers.get("content-type", "html"):
+                return None
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) >= config.WEBSITE_MAX_PAGE_BYTES:
+                    break
+        return body.decode(response.encoding or "utf-8", "ignore")
+
+    async def _wait_for_host(self, host):
+        """
+        Keeps requests to the same host 1-2 s apart. The first request to a host goes out at
+        once, and different hosts never wait for each other. The slot is reserved before
+        sleeping, so concurrent fetches to one host queue up in order.
+        """
+        now = time.monotonic()
+        slot = max(now, self.host_next_fetch.get(host, now))
+        self.host_next_fetch[host] = slot + random.uniform(1, 2)
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def _extract_page(self, html, base_url, base_domain, only_high_value):
+        """Parses a page and returns (text, links). Links are read before navigation is stripped."""
+        tree = HTMLParser(html)
+        links = self._find_links(tree, base_url, base_domain, only_high_value)
+        return self._get_clean_text(tree), links
+
+    async def _scrape_page(self, client, url, base_url, base_domain, only_high_value):
+        """Fetches a page, then parses it in a worker thread so other fetches keep flowing."""
+        html = await self._fetch_page(client, url)
+        if html is None:
+            return None
+        return await asyncio.to_thread(self._extract_page, html, base_url, base_domain, only_high_value)
+
+    async def _crawl_stage(self, client, company_name, base_url, visited_urls, stage, document_limit):
+        """
+        Crawls one stage breadth-first. Up to WEBSITE_PAGES_PER_BATCH pages are in flight at once,
+        and each is processed as soon as it arrives, so parsing overlaps with the next fetches.
+        Stage 1 follows high-value links and PDFs; stage 2 follows every link but skips PDFs.
+        """
+        high_value = stage == 1
+        doc_type = "website_high_value" if high_value else "website_general"
+        page_label = "High-Value Page" if high_value else "General Page"
+        base_domain = urlsplit(base_url).netloc
+        frontier = deque([base_url])
+        queued_urls = {base_url}
+        documents = []
+        in_flight = {}
+
+        while frontier or in_flight:
+            open_slots = min(config.WEBSITE_PAGES_PER_BATCH, document_limit - len(documents)) - len(in_flight)
+            for url in self._next_batch(frontier, visited_urls, max(open_slots, 0)):
+                if url.lower().endswith('.pdf'):
+                    if high_value:
+                        in_flight[asyncio.create_task(asyncio.to_thread(self._scrape_pdf, company_name, url))] = url
+                    continue
+                in_flight[asyncio.create_task(self._scrape_page(client, url, base_url, base_domain, high_value))] = url
+            if not in_flight:
+                if not frontier or open_slots <= 0:
+                    break
+                continue
+
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                url = in_flight.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    print(f"    ⚠️  Could not scrape {url} in Stage {stage}: {e}")
+                    continue
+                if url.lower().endswith('.pdf'):
+                    documents.extend(result) # Use extend for list of docs
+                    continue
+                if result is None:
+                    continue
+                page_text, new_links = result
+                self._enqueue_links(frontier, queued_urls, new_links - visited_urls)
+                if page_text:
+                    print(f"    ✅ Scraped {page_label}: {url}")
+                    documents.append(Document(page_content=page_text, metadata={"company": company_name, "source": url, "type": doc_type}))
+
+            if len(documents) >= document_limit:
+                break
+
+        for task in in_flight:
+            task.cancel()
+        return documents
+
+    def _next_batch(self, frontier, visited_urls, size):
+        """Takes up to `size` unvisited URLs off the front of the frontier and marks them visited."""
+        batch = []
+        while frontier and len(batch) < size:
+            url = frontier.popleft()
+            if url not in visited_urls:
+                visited_urls.add(url)
+                batch.append(url)
+        return batch
+
+    async def scrape_website(self, client, company_name, base_url):
         """
         Crawls a website in two stages: high-value content first, then general content.
+        Pages within each stage are fetched concurrently over the shared `client`.
         """
         if not base_url or not isinstance(base_url, str) or not base_url.startswith('http'):
             print(f"    -> Invalid or missing base URL for {company_name}, skipping.")
             return []
 
         try:
-            domain = urlparse(base_url).netloc.replace('www.', '')
+            domain = urlsplit(base_url).netloc.replace('www.', '')
             if domain in self.excluded_domains:
                 print(f"    -> Skipping website scrape for '{company_name}' due to social media link: {base_url}")
                 return []
@@ -144,82 +325,49 @@ class WebsiteScraper:
             pass
 
         print(f"  -> Starting 2-stage website scrape for '{company_name}' at {base_url}")
-        documents = []
+        base_url = self._canonical_url(base_url)
         visited_urls = set()
-        base_domain = urlparse(base_url).netloc
 
         # --- Stage 1: Hunt for High-Value Documents ---
-        print("\n    --- Stage 1: Searching for High-Value Documents (Reports, Press, etc.) ---")
-        high_value_urls_to_visit = {base_url}
-        
-        while len(documents) < (config.NO_OF_WEBSITE_PAGES_TO_SCRAPE * 5) and high_value_urls_to_visit: # Allow more docs if they are PDF pages
-            url = high_value_urls_to_visit.pop()
-            if url in visited_urls:
-                continue
-            
-            visited_urls.add(url)
-            
-            if url.lower().endswith('.pdf'):
-                pdf_docs = self._scrape_pdf(company_name, url)
-                documents.extend(pdf_docs) # Use extend for list of docs
-                continue
-
-            try:
-                time.sleep(random.uniform(1, 2))
-                # FIX: Added verify=False to ignore SSL certificate verification errors.
-                response = requests.get(url, headers=self.headers, timeout=10, verify=False)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.content, 'html.parser')
-
-                new_links = self._find_links(soup, base_url, base_domain, only_high_value=True)
-                high_value_urls_to_visit.update(new_links - visited_urls)
-
-                page_text = self._get_clean_text(soup)
-                if page_text:
-                    print(f"    ✅ Scraped High-Value Page: {url}")
-                    documents.append(Document(page_content=page_text, metadata={"company": company_name, "source": url, "type": "website_high_value"}))
-            except Exception as e:
-                print(f"    ⚠️  Could not scrape {url} in Stage 1: {e}")
-
-        print(f"\n    --- Stage 1 Complete. Found {len(documents)} high-value document chunks. ---")
+        print(f"\n    --- Stage 1 ({company_name}): Searching for High-Value Documents (Reports, Press, etc.) ---")
+        # Allow more docs if they are PDF pages
+        documents = await self._crawl_stage(client, company_name, base_url, visited_urls, 1, config.NO_OF_WEBSITE_PAGES_TO_SCRAPE * 5)
+        print(f"\n    --- Stage 1 Complete for {company_name}. Found {len(documents)} high-value document chunks. ---")
 
         # --- Stage 2: General Website Crawl (only if stage 1 found little) ---
         if len(documents) < 5:
-            print("\n    --- Stage 2: Performing General Website Crawl ---")
-            general_urls_to_visit = {base_url}
-            general_docs_found = 0
-            
-            while general_docs_found < config.NO_OF_WEBSITE_PAGES_TO_SCRAPE and general_urls_to_visit:
-                url = general_urls_to_visit.pop()
-                if url in visited_urls:
-                    continue
-                
-                visited_urls.add(url)
-                
-                if url.lower().endswith('.pdf'):
-                    continue
-
-                try:
-                    time.sleep(random.uniform(1, 2))
-                    response = requests.get(url, headers=self.headers, timeout=10, verify=False)
-                    response.raise_for_status()
-                    soup = BeautifulSoup(response.content, 'html.parser')
-
-                    page_text = self._get_clean_text(soup)
-                    if page_text:
-                        print(f"    ✅ Scraped General Page: {url}")
-                        documents.append(Document(page_content=page_text, metadata={"company": company_name, "source": url, "type": "website_general"}))
-                        general_docs_found += 1
-                    
-                    new_links = self._find_links(soup, base_url, base_domain)
-                    general_urls_to_visit.update(new_links - visited_urls)
-
-                except Exception as e:
-                    print(f"    ⚠️  Could not scrape {url} in Stage 2: {e}")
+            print(f"\n    --- Stage 2 ({company_name}): Performing General Website Crawl ---")
+            documents.extend(await self._crawl_stage(client, company_name, base_url, visited_urls, 2, config.NO_OF_WEBSITE_PAGES_TO_SCRAPE))
 
         print(f"\n  -> Finished scraping. Found {len(documents)} total document chunks from {company_name}'s website.")
         return documents
 
+    async def _scrape_all(self, companies):
+        """Crawls every company's website concurrently over one pooled HTTP client."""
+        semaphore = asyncio.Semaphore(config.WEBSITE_CONCURRENT_COMPANIES)
+        # httpx resolves host names in a worker thread, never on the event loop. Idle connections
+        # are kept for 30 s (default 5 s) so the politeness delay between a site's pages does not
+        # force a fresh DNS lookup and TLS handshake for every batch.
+        limits = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30)
+
+        async with httpx.AsyncClient(
+            headers=self.headers, timeout=10, verify=self.ssl_verify, follow_redirects=True, limits=limits
+        ) as client:
+            async def scrape_one(company_name, base_url):
+                async with semaphore:
+                    return await self.scrape_website(client, company_name, base_url)
+
+            return await asyncio.gather(*(scrape_one(company_name, base_url) for company_name, base_url in companies))
+
+    def scrape_websites(self, companies):
+        """
+        Scrapes the websites of several companies concurrently.
+        `companies` is a list of (company_name, base_url) pairs; returns all their documents.
+        """
+        results = asyncio.run(self._scrape_all(companies))
+        return [document for documents in results for document in documents]
+
     def close(self):
-        """A method for consistency with other scrapers."""
+        """Closes the PDF download session."""
+        self.session.close()
         print("  -> Website scraper session closed.")
@@ -4,15 +4,25 @@
 Utility functions for data handling, API clients, and the LangChain vector store.
 """
 
+import functools
 import pandas as pd
 import os
+import pickle
+import shutil
 import re # Import re module
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_openai import ChatOpenAI
 
 import config
 
+# Corporate suffixes (and anything after them) stripped from company names.
+# ADDED 'Company' to the list of suffixes to be removed by the regex. This is the key fix.
+# Compiled once here, since the cleaning runs for every row of the input CSV. Special characters
+# and suffixes are removed in one pass: both alternatives match against the original name, so
+# the result is the same as stripping suffixes first and punctuation second.
+NAME_CLEANUP_PATTERN = re.compile(r'[.&,]|\s*\b(?:P\.J\.S\.C|PJSC|P\.S\.C|PSC|L\.L\.C|LLC|FZ|DMCC|F\.Z|PLC|Limited|Company)\b.*', re.IGNORECASE)
+
+# The only columns of the enriched CSV the scraping steps read
+ENRICHED_COLUMNS = ['Cleaned Name', 'linkedin_url', 'website_url']
+
 # --- REVISED: Centralized Cleaning Function ---
 def clean_company_name(name):
     """
@@ -21,21 +31,22 @@ def clean_company_name(name):
     """
     if not isinstance(name, str):
         return ""
-    # ADDED 'Company' to the list of suffixes to be removed by the regex.
-    # This is the key fix.
-    suffixes_to_remove = r'\s*\b(P\.J\.S\.C|PJSC|P\.S\.C|PSC|L\.L\.C|LLC|FZ|DMCC|F\.Z|PLC|Limited|Company)\b.*'
-    name = re.sub(suffixes_to_remove, '', name, flags=re.IGNORECASE)
-    # Remove special characters and extra whitespace
-    name = re.sub(r'[.&,]', '', name)
-    return name.strip()
+    # Remove suffixes, special characters and extra whitespace
+    return NAME_CLEANUP_PATTERN.sub('', name).strip()
 
 # --- Data Loading ---
 def load_and_clean_companies(csv_path):
     """Loads and cleans company data from a CSV file."""
     try:
-        df = pd.read_csv(csv_path)
-        # Use the revised centralized cleaning function
-        df['Cleaned Name'] = df['Institution Name'].apply(clean_company_name)
+        # Parsed by the multi-threaded Arrow reader; names go straight into a string column
+        df = pd.read_csv(csv_path, engine='pyarrow', dtype={'Institution Name': 'string'})
+        # Same cleaning as clean_company_name, run column-wise by pandas instead of row by row.
+        # Each distinct name is cleaned once and mapped back, since institutions repeat across records.
+        unique_names = df['Institution Name'].dropna().drop_duplicates()
+        cleaned_names = unique_names.str.replace(NAME_CLEANUP_PATTERN, '', regex=True).str.strip()
+        names = df['Institution Name'].map(dict(zip(unique_names, cleaned_names)))
+        # Kept Arrow-backed (contiguous UTF-8 buffers) for the .str filters and lookups downstream
+        df['Cleaned Name'] = names.fillna('').astype('string[pyarrow]')
         return df
     except FileNotFoundError:
         print(f"Error: The file '{csv_path}' was not found.")
@@ -45,9 +56,15 @@ def load_and_clean_companies(csv_path):
         return None
 
 def load_enriched_data(csv_path):
-    """Loads the CSV file containing all company data and URLs."""
+    """Loads the company names and URLs from the CSV file written by Step 1."""
     try:
-        df = pd.read_csv(csv_path)
+        # Check the header first: a file from an older Step 1 may lack some columns,
+        # which the pyarrow reader would only report as an opaque error.
+        missing_columns = [column for column in ENRICHED_COLUMNS if column not in pd.read_csv(csv_path, nrows=0).columns]
+        if missing_columns:
+            print(f"Error: The file '{csv_path}' is missing the column(s) {', '.join(missing_columns)}. Please re-run Step 1 (--find-urls).")
+            return None
+        df = pd.read_csv(csv_path, engine='pyarrow', usecols=ENRICHED_COLUMNS, dtype={column: 'string[pyarrow]' for column in ENRICHED_COLUMNS})
         return df
     except FileNotFoundError:
         print(f"Error: The file '{csv_path}' was not found. Please run Step 1 (--find-urls) first.")
@@ -67,30 +84,146 @@ def get_llm():
     if not config.OPENAI_API_KEY:
         print("\n❌ OpenAI API key not found in .env file.")
         return None
+    from langchain_openai import ChatOpenAI
     return ChatOpenAI(model=config.LLM_MODEL, temperature=0, api_key=config.OPENAI_API_KEY)
 
 # --- Vector Store Management (LangChain Implementation) ---
-def get_vector_store():
+@functools.lru_cache(maxsize=1)
+def _get_embeddings():
+    """
+    Loads the embedding model once per process. Scraping and analysis in the same run
+    share it instead of reloading the weights from disk for every vector store.
+    """
+    import torch
+    from langchain_huggingface import HuggingFaceEmbeddings
+    use_gpu = torch.cuda.is_available()
+    device = "cuda" if use_gpu else "cpu"
+    print(f"   -> Loading embedding model '{config.EMBEDDING_MODEL}' on {device}...")
+    embeddings = HuggingFaceEmbeddings(
+        model_name=config.EMBEDDING_MODEL,
+        model_kwargs={"device": device},
+        encode_kwargs={
+            "batch_size": config.EMBEDDING_BATCH_SIZE_GPU if use_gpu else config.EMBEDDING_BATCH_SIZE_CPU,
+            "convert_to_numpy": True
+        }
+    )
+    if use_gpu:
+        # Half-precision weights roughly double GPU throughput; bfloat16 keeps float32's range
+        dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        embeddings.client.to(dtype)
+    return embeddings
+
+@functools.lru_cache(maxsize=1)
+def _import_faiss():
+    """Imports FAISS and sets its process-wide OpenMP thread count once."""
+    import faiss
+    faiss.omp_set_num_threads(config.FAISS_NUM_THREADS)
+    return faiss
+
+def _load_vector_store_mmap(embeddings):
+    """
+    Loads the saved store with its index memory-mapped read-only, so vectors are paged in
+    from disk on demand instead of copied into RAM. Used when nothing will be added.
+    """
+    from langchain_community.vectorstores import FAISS
+    faiss = _import_faiss()
+    index = faiss.read_index(
+        os.path.join(config.FAISS_INDEX_PATH, "index.faiss"),
+        faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    )
+    with open(os.path.join(config.FAISS_INDEX_PATH, "index.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    return FAISS(embedding_function=embeddings, index=index, docstore=docstore, index_to_docstore_id=index_to_docstore_id)
+
+def get_vector_store(mmap=False, embeddings=None):
     """
     Initializes and returns a LangChain FAISS vector store.
     It will load from disk if it exists, otherwise it will create a new one.
+    Pass `mmap=True` for read-only use (analysis) to memory-map the index instead of loading it.
+    FAISS searches use at most config.FAISS_NUM_THREADS threads. Callers that already hold an
+    embedding model can pass it as `embeddings`; otherwise the shared model is used.
     """
     print("🧠 Initializing LangChain vector store...")
-    embeddings = HuggingFaceEmbeddings(model_name=config.EMBEDDING_MODEL)
+    _recover_interrupted_save()
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    embeddings = embeddings or _get_embeddings()
+    faiss = _import_faiss()
     
     index_file_path = os.path.join(config.FAISS_INDEX_PATH, "index.faiss")
 
     if os.path.exists(index_file_path):
-        vector_store = FAISS.load_local(
-            config.FAISS_INDEX_PATH, 
-            embeddings, 
-            allow_dangerous_deserialization=True
-        )
+        vector_store = None
+        if mmap:
+            try:
+                vector_store = _load_vector_store_mmap(embeddings)
+            except Exception as e:
+                print(f"   -> Could not memory-map the knowledge base ({e}). Loading it into memory instead.")
+        if vector_store is None:
+            vector_store = FAISS.load_local(
+                config.FAISS_INDEX_PATH, 
+                embeddings, 
+                allow_dangerous_deserialization=True
+            )
         print(f"✅ Knowledge base loaded from disk. Contains {vector_store.index.ntotal} vectors.")
     else:
         print("   -> No existing knowledge base found. A new one will be created upon adding documents.")
         os.makedirs(config.FAISS_INDEX_PATH, exist_ok=True)
-        vector_store = FAISS.from_texts(["init"], embeddings)
-        vector_store.delete([vector_store.index_to_docstore_id[0]])
+        # Build the empty index directly, instead of embedding and deleting a placeholder text
+        # Injected embeddings need not be SentenceTransformer-backed; measure those with one query
+        get_dimension = getattr(getattr(embeddings, "client", None), "get_sentence_embedding_dimension", None)
+        dimension = (get_dimension() if get_dimension else None) or len(embeddings.embed_query("init"))
+        index = faiss.index_factory(dimension, config.FAISS_INDEX_FACTORY)
+        if not index.is_trained:
+            print(f"   -> Index type '{config.FAISS_INDEX_FACTORY}' needs training data up front. Using a flat index instead.")
+            index = faiss.IndexFlatL2(dimension)
+        vector_store = FAISS(
+            embedding_function=embeddings,
+            index=index,
+            docstore=InMemoryDocstore(),
+            index_to_docstore_id={}
+        )
 
     return vector_store
+
+def _store_paths():
+    """Returns the (live, temporary, previous) directories used when saving the store."""
+    live_path = config.FAISS_INDEX_PATH.rstrip("/\\")
+    return live_path, live_path + ".tmp", live_path + ".old"
+
+def _recover_interrupted_save():
+    """Puts the previous store back if a save was interrupted between its two renames."""
+    live_path, _, old_path = _store_paths()
+    if not os.path.exists(live_path) and os.path.exists(old_path):
+        print("   -> Restoring the knowledge base from an interrupted save...")
+        os.rename(old_path, live_path)
+
+def save_vector_store(vector_store):
+    """
+    Writes the whole store (index and docstore together) to a temporary directory, then swaps
+    directories: the live one is renamed aside and the new one renamed into place. The index
+    and its docstore are therefore always replaced as a pair.
+    """
+    live_path, temp_path, old_path = _store_paths()
+    shutil.rmtree(temp_path, ignore_errors=True)
+    vector_store.save_local(temp_path)
+
+    _recover_interrupted_save()
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(live_path):
+        os.rename(live_path, old_path)
+    os.rename(temp_path, live_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+def add_documents_batched(vector_store, documents, batch_size=256):
+    """
+    Preferred way to add scraped documents to the store. Texts are embedded in slices of
+    `batch_size` (each encoded in the model's own mini-batches) and the precomputed vectors
+    are added directly, so peak memory stays bounded for large scrapes.
+    """
+    embeddings = vector_store.embeddings or _get_embeddings()
+    for start in range(0, len(documents), batch_size):
+        batch = documents[start:start + batch_size]
+        texts = [doc.page_content for doc in batch]
+        vectors = embeddings.embed_documents(texts)
+        vector_store.add_embeddings(list(zip(texts, vectors)), metadatas=[doc.metadata for doc in batch])